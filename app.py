@@ -1,412 +1,354 @@
-import streamlit as st
-import pandas as pd
-import io
-import re
-import json
-import os
-from datetime import datetime
-import math
-import base64
-
-# --- CONFIGS ---
-STATE_FILE = "estado_sequenciais.json"
-MAX_SEQ = 999_999
-
-COLUNAS_OBRIGATORIAS = [
-    'Nº DO ITEM', 'Nº DA PEÇA', 'TÍTULO', 'QTD.',
-    'PROCESSO', 'GRUPO DE PRODUTO'
-]
-
-# --- Estilo ---
-st.set_page_config(layout="wide", page_title="SolidWorks BOM Processor")
-
-# Função para converter imagens para base64
-def get_image_as_base64(path):
-    try:
-        with open(path, "rb") as f:
-            data = f.read()
-        return base64.b64encode(data).decode()
-    except IOError:
-        return None
-
-# Carregando a imagem de fundo do novo cabeçalho
-header_bg_base64 = get_image_as_base64("header_bg.jpg")
-
-# SVG do ícone do cabeçalho
-icon_svg = """
-<svg xmlns="http://www.w3.org/2000/svg" width="32" height="32" fill="currentColor" class="bi bi-file-earmark-spreadsheet-fill" viewBox="0 0 16 16">
-  <path d="M6 12v-2h3v2H6z"/>
-  <path d="M9.293 0H4a2 2 0 0 0-2 2v12a2 2 0 0 0 2 2h8a2 2 0 0 0 2-2V4.707A1 1 0 0 0 13.707 4L10 .293A1 1 0 0 0 9.293 0zM9.5 3.5v-2l3 3h-2a1 1 0 0 1-1-1zM3 9h10v1h-3v2h3v1h-3v2H9v-2H6v2H5v-2H3v-1h2v-2H3V9z"/>
-</svg>
-"""
-
-# Estilo para o cabeçalho
-header_style = ""
-if header_bg_base64:
-    header_style = f"""
-        background-image: linear-gradient(rgba(90, 102, 61, 0.9), rgba(90, 102, 61, 0.9)), url(data:image/jpeg;base64,{header_bg_base64});
-    """
-else:
-    header_style = "background: linear-gradient(45deg, #5a663d, #7E8C54);"
-
-st.markdown(f"""
-<style>
-    :root {{
-        --main-bg-color: #A3CB38;
-        --accent-teal: #008080;
-        --light-green-card: #e6f3d8;
-        --upload-button-color: #B3D10D;
-        --upload-button-text-color: #2D2D2D;
-    }}
-    .stApp {{ background-color: var(--main-bg-color); }}
-    h1, h2, h3 {{ color: #1a202c !important; }}
-    .banner-header {{ display: flex; align-items: center; gap: 20px; padding: 1.5rem; border-radius: 12px; margin-bottom: 2rem; color: white; {header_style} background-size: cover; background-position: center; }}
-    .banner-icon {{ background-color: var(--upload-button-color); border-radius: 50%; width: 64px; height: 64px; display: flex; align-items: center; justify-content: center; flex-shrink: 0; }}
-    .banner-icon svg {{ color: var(--upload-button-text-color); }}
-    .banner-text h1 {{ font-size: 2.2rem; font-weight: 700; color: #FFFFFF !important; margin: 0; line-height: 1.2; }}
-    .banner-text p {{ font-size: 1.1rem; color: rgba(255, 255, 255, 0.9) !important; margin: 0; }}
-    .st-emotion-cache-eah9w0 {{ background-color: #FFFFFF; border: 1px solid #c3d9a5; border-radius: 12px; padding: 25px; box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.05), 0 2px 4px -1px rgba(0, 0, 0, 0.04); margin-bottom: 20px; }}
-    .upload-box, .card-dark-results {{ background-color: var(--accent-teal); color: #FFFFFF; border-radius: 12px; padding: 1.5rem; }}
-    .upload-box h1, .upload-box h2, .upload-box h3, .upload-box p, .upload-box small,
-    .card-dark-results h1, .card-dark-results h2, .card-dark-results h3, .card-dark-results p, .card-dark-results small {{ color: #FFFFFF !important; }}
-    .stButton > button {{ border-radius: 8px; padding: 8px 20px; font-weight: 600; transition: all 0.2s ease-in-out; width: 100%; }}
-    .stButton > button:hover {{ filter: brightness(1.1); }}
-    .stButton[data-testid="stFormSubmitButton"] > button,
-    .stButton:has( > [data-testid="stMarkdownContainer"] :contains("Resetar Campos")) > button,
-    .stButton:has( > [data-testid="stMarkdownContainer"] :contains("Resetar Seleção")) > button {{ background-color: var(--accent-teal) !important; color: #FFFFFF !important; border: 1px solid var(--accent-teal) !important; }}
-    .stButton[data-testid="stFormSubmitButton"] > button:hover,
-    .stButton:has( > [data-testid="stMarkdownContainer"] :contains("Resetar Campos")) > button:hover,
-    .stButton:has( > [data-testid="stMarkdownContainer"] :contains("Resetar Seleção")) > button:hover {{ background-color: var(--accent-teal) !important; filter: brightness(1.1); }}
-    .upload-box [data-testid="stFileUploader"] {{ border: 2px dashed #4E8A96; border-radius: 8px; }}
-    .upload-box [data-testid="stFileUploader"] section {{ padding: 2rem 1rem; background-color: transparent; border: none; }}
-    .upload-box [data-testid="stFileUploader"] button {{ background-color: var(--upload-button-color) !important; color: var(--upload-button-text-color) !important; border: none !important; border-radius: 8px !important; font-weight: 600 !important; padding: 10px 24px !important; }}
-    .upload-box [data-testid="stFileUploader"] small {{ color: rgba(255, 255, 255, 0.8); }}
-    .formatos-suportados {{ text-align: left; margin-top: 1.5rem; font-size: 0.9rem; color: rgba(255, 255, 255, 0.9); }}
-    .formatos-suportados strong {{ color: white; }} .formatos-suportados li {{ margin-left: 20px; }}
-    .report-container {{ max-height: 400px; overflow-y: auto; padding-right: 10px; }}
-    .report-item {{ display: flex; align-items: center; padding: 12px; margin-bottom: 8px; border-radius: 8px; border: 1px solid; }}
-    .report-item-icon {{ display: flex; justify-content: center; align-items: center; min-width: 24px; height: 24px; border-radius: 50%; margin-right: 12px; font-weight: bold; color: white; }}
-    .report-item-success {{ background-color: #e6f3d8; border-color: #c3d9a5; }} .report-item-success .report-item-icon {{ background-color: #6E9B44; }}
-    .report-item-info {{ background-color: #e0f2f7; border-color: #a0c4d1; }} .report-item-info .report-item-icon {{ background-color: #007B9E; }}
-    .report-item-warning {{ background-color: #fff3cd; border-color: #ffda77; }} .report-item-warning .report-item-icon {{ background-color: #FFAA00; }}
-    .stDownloadButton > button {{ background-color: var(--upload-button-color) !important; color: var(--upload-button-text-color) !important; font-size: 1.1rem !important; font-weight: 700 !important; padding: 1rem !important; border-radius: 12px !important; border: none !important; width: 100%; }}
-    .stDownloadButton > button:hover {{ filter: brightness(1.05); color: #000 !important; }}
-    [data-testid="stNumberInput"] > div > input {{ background-color: var(--upload-button-color) !important; color: var(--upload-button-text-color) !important; border: none !important; border-radius: 8px !important; padding: 8px 12px !important; font-weight: 600 !important; }}
-    [data-testid="stNumberInput"] > div > input:focus {{ box-shadow: 0 0 0 2px var(--accent-teal) !important; }}
-</style>
-""", unsafe_allow_html=True)
-
-# --- Funções auxiliares ---
-def load_sequentials(file_path=STATE_FILE):
-    if os.path.exists(file_path):
-        with open(file_path, "r", encoding="utf-8") as f:
-            try: return json.load(f)
-            except json.JSONDecodeError: return {}
-    return {}
-
-def save_sequentials(data, file_path=STATE_FILE):
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
-
-@st.cache_data
-def load_data(uploaded_file):
-    if uploaded_file is None: return None, [], "Nenhum arquivo carregado."
-    report_log, df = [], None
-    try:
-        name = uploaded_file.name.lower()
-        if name.endswith(".xlsx"): 
-            df = pd.read_excel(uploaded_file)
-        elif name.endswith(".txt"):
-            content_bytes = uploaded_file.getvalue()
-            try:
-                content_str = content_bytes.decode('utf-8')
-            except UnicodeDecodeError:
-                report_log.append("ℹ️ Arquivo não é UTF-8, tentando decodificar como Latin-1.")
-                content_str = content_bytes.decode('latin-1')
-            
-            lines = [line for line in content_str.splitlines() if line.strip()]
-            if not lines:
-                return None, [], "Arquivo TXT está vazio ou contém apenas linhas em branco."
-            
-            header_line = lines[-1]
-            data_lines = lines[:-1]
-            header = [h.strip() for h in header_line.split('\t')]
-            data_io = io.StringIO("\n".join(data_lines))
-            
-            df = pd.read_csv(data_io, sep='\t', header=None, names=header, engine='python', dtype=str)
-            df = df.iloc[::-1].reset_index(drop=True)
-        else: 
-            return None, [], "Formato de arquivo não suportado."
-
-        missing_cols = set(COLUNAS_OBRIGATORIAS) - set(df.columns)
-        if missing_cols:
-            report_log.append(f"⚠️ Colunas obrigatórias ausentes (criadas vazias): **{', '.join(sorted(list(missing_cols)))}**")
-            for col in sorted(list(missing_cols)): 
-                df[col] = ''
-        
-        final_order = COLUNAS_OBRIGATORIAS + sorted(list(set(df.columns) - set(COLUNAS_OBRIGATORIAS)))
-        df = df[final_order].copy()
-        df['QTD.'] = pd.to_numeric(df['QTD.'], errors='coerce').fillna(0)
-        df.fillna('', inplace=True)
-        return df, report_log, "Arquivo lido com sucesso."
-        
-    except Exception as e: 
-        st.error(f"Ocorreu um erro crítico ao ler o arquivo: {e}")
-        return None, [f"❌ Erro ao ler o arquivo: {e}"], f"Erro ao ler o arquivo: {e}"
-
-# ==============================================================================
-# ======================== FUNÇÃO PROCESS_CODES ATUALIZADA =====================
-# ==============================================================================
-def process_codes(df, sequentials, json_state, column_report, main_assembly_code):
-    if df is None or df.empty: return pd.DataFrame(), [], "DataFrame vazio."
-    
-    report_log = list(column_report)
-    
-    for g in sequentials.keys(): 
-        sequentials[g] = max(int(sequentials[g]), int(json_state.get(g, 0)))
-
-    group_pattern = re.compile(r'(\d{3})')
-    manu_pattern = re.compile(r'^\d{2}-\d{4}-\d{4}-.*')
-    comm_pattern = re.compile(r'^\d{3}-(\d+)$')
-    special_structure_pattern = re.compile(r'^\d{2}-\d{4}-[A-Za-z0-9]{4}-\d{2}$')
-
-    df['PROCESSO'] = df['PROCESSO'].astype(str).str.strip().str.upper()
-    empty_process = df['PROCESSO'].isin(['', 'NAN', None]) | pd.isna(df['PROCESSO'])
-    count_filled = 0
-    for i in df[empty_process].index:
-        is_manu = manu_pattern.match(str(df.loc[i, 'Nº DA PEÇA']))
-        df.loc[i, 'PROCESSO'] = 'FABRICADO' if is_manu else 'COMERCIAL'
-        count_filled += 1
-    if count_filled > 0: 
-        report_log.append(f"✔️ Coluna 'PROCESSO' preenchida para {count_filled} itens.")
-
-    df['CÓDIGO FINAL'] = 'NULO'
-    
-    for _, row in df.iterrows():
-        num = str(row.get('Nº DA PEÇA',''))
-        if m := comm_pattern.match(num):
-            try:
-                group, seq_str = num.split('-')
-                sequentials[group] = max(sequentials.get(group, 0), int(seq_str))
-            except: 
-                continue
-
-    generated_codes_count = 0
-    for i, row in df.iterrows():
-        num_peca = str(row.get('Nº DA PEÇA',''))
-        
-        if special_structure_pattern.match(num_peca):
-            df.loc[i, 'CÓDIGO FINAL'] = num_peca
-            continue
-
-        if row['PROCESSO'] == 'FABRICADO':
-            df.loc[i, 'CÓDIGO FINAL'] = row.get('Nº DA PEÇA', '')
-            continue
-
-        if (m_direct := comm_pattern.match(num_peca)) and len(m_direct.group(1)) == 6:
-            df.loc[i, 'CÓDIGO FINAL'] = num_peca
-            continue
-            
-        if m := group_pattern.search(str(row.get('GRUPO DE PRODUTO',''))):
-            g = m.group(1)
-            next_code = sequentials.get(g, 0) + 1
-            
-            while f"{g}-{next_code:06d}" in df['CÓDIGO FINAL'].values: 
-                next_code += 1
-            
-            if next_code > MAX_SEQ: 
-                raise Exception(f"Limite de 6 dígitos atingido para o grupo {g}.")
-            
-            sequentials[g] = next_code
-            new_code = f"{g}-{sequentials[g]:06d}"
-            df.loc[i, 'CÓDIGO FINAL'] = new_code
-            generated_codes_count += 1
-        else:
-            report_log.append(f"⚠️ \"{row.get('TÍTULO','')}\" COMERCIAL sem grupo -> NULO")
-
-    # --- LÓGICA DO CÓDIGO PAI ATUALIZADA ---
-    df['Nº DO ITEM'] = df['Nº DO ITEM'].astype(str).str.strip()
-    code_map = pd.Series(df['CÓDIGO FINAL'].values, index=df['Nº DO ITEM']).to_dict()
-
-    def find_parent_code(item_id):
-        parts = item_id.split('.')
-        while len(parts) > 1:
-            parts.pop()
-            if (parent := '.'.join(parts)) in code_map: 
-                return code_map[parent]
-        return ""
-    
-    df['CÓDIGO PAI'] = df['Nº DO ITEM'].apply(find_parent_code)
-    
-    # NOVO: Aplica o código do conjunto principal aos itens de nível superior
-    if main_assembly_code:
-        main_code_upper = str(main_assembly_code).strip().upper()
-        # Aplica somente onde o 'CÓDIGO PAI' está em branco
-        df.loc[df['CÓDIGO PAI'] == '', 'CÓDIGO PAI'] = main_code_upper
-    
-    df['TIPO'] = df.apply(lambda r: 1 if r['PROCESSO'] == 'FABRICADO' else 2 if r['CÓDIGO FINAL'] != 'NULO' else 3, axis=1)
-    df = df.sort_values(by=['TIPO','CÓDIGO FINAL']).drop(columns=['TIPO']).reset_index(drop=True)
-
-    for col in df.select_dtypes(include=['object']): 
-        df[col] = df[col].astype(str).str.upper()
-
-    save_sequentials({k:int(v) for k,v in sequentials.items()})
-
-    report_log.insert(0, f"✅ Processamento concluído. {generated_codes_count} novos códigos comerciais foram gerados.")
-    return df, report_log
-
-@st.cache_data
-def to_excel(df):
-    out = io.BytesIO()
-    with pd.ExcelWriter(out, engine='xlsxwriter') as w: df.to_excel(w, index=False, sheet_name='Lista de Peças')
-    return out.getvalue()
-    
-# --- Interface --- #
-st.markdown(f"""
-<div class="banner-header">
-    <div class="banner-icon">{icon_svg}</div>
-    <div class="banner-text">
-        <h1>SolidWorks BOM Processor</h1>
-        <p>Processamento automático de listas de materiais exportadas do SolidWorks</p>
-    </div>
-</div>
-""", unsafe_allow_html=True)
-
-col1, col2 = st.columns([5, 7])
-
-with col1:
-    with st.container(border=True):
-        st.subheader("⚙️ Tabela de Grupos")
-        group_table = { "100":"Mecânico", "200":"Elétrico", "300":"Hidráulico Água", "400":"Hidráulico Óleo", "500":"Pneumático", "600":"Tecnologia", "700":"Infraestrutura", "800":"Insumos", "900":"Segurança", "950":"Serviço" }
-        json_state = load_sequentials()
-        if "version" not in st.session_state: st.session_state["version"] = 0
-        version = st.session_state["version"]
-        t_cols = st.columns([1, 2, 2])
-        t_cols[0].markdown("**Grupo**")
-        t_cols[1].markdown("**Descrição**")
-        t_cols[2].markdown("**Próximo Nº**")
-        for g, desc in group_table.items():
-            g_cols = st.columns([1, 2, 2])
-            g_cols[0].write(f"`{g}`")
-            g_cols[1].write(desc)
-            key = f"seq_{g}_v{version}"
-            init_val = int(st.session_state.get(key, json_state.get(g, 0)))
-            g_cols[2].number_input(f"seq_{g}", min_value=0, max_value=MAX_SEQ, value=init_val, step=1, key=key, label_visibility="collapsed")
-
-    if "last_report" in st.session_state:
-        with st.container(border=True):
-            st.subheader("📊 Relatório de Processamento")
-            st.markdown('<div class="report-container">', unsafe_allow_html=True)
-            for log in st.session_state["last_report"]:
-                if log.startswith("✅"): st.markdown(f'<div class="report-item report-item-success"><div class="report-item-icon">✓</div><div>{log[2:]}</div></div>', unsafe_allow_html=True)
-                elif log.startswith("✔️"): st.markdown(f'<div class="report-item report-item-success"><div class="report-item-icon">✓</div><div>{log[2:]}</div></div>', unsafe_allow_html=True)
-                elif log.startswith("⚠️"): st.markdown(f'<div class="report-item report-item-warning"><div class="report-item-icon">!</div><div>{log[2:]}</div></div>', unsafe_allow_html=True)
-                else: st.markdown(f'<div class="report-item report-item-info"><div class="report-item-icon">i</div><div>{log}</div></div>', unsafe_allow_html=True)
-            st.markdown('</div>', unsafe_allow_html=True)
-
-with col2:
-    with st.container(border=True):
-        st.markdown('<div class="upload-box">', unsafe_allow_html=True)
-        st.subheader("1. Carregar Arquivo")
-        uploaded_file = st.file_uploader(
-            "Arraste e solte seu arquivo aqui ou clique para selecionar",
-            type=['txt', 'xlsx']
-        )
-        st.markdown("""
-        <div class="formatos-suportados">
-            <strong>Formatos suportados:</strong>
-            <ul><li>TXT e XLSX</li></ul>
-        </div>
-        """, unsafe_allow_html=True)
-        st.markdown('</div>', unsafe_allow_html=True)
-
-    # ==============================================================================
-    # ======================== NOVO CAMPO ADICIONADO AQUI ==========================
-    # ==============================================================================
-    with st.container(border=True):
-        st.subheader("2. Informação do Conjunto")
-        main_assembly_code = st.text_input(
-            "Código do Conjunto Principal",
-            help="Insira o código do conjunto principal (ex: 10-3515-0000-00). Ele será usado como 'Código Pai' para os itens de nível superior.",
-            placeholder="Ex: 10-3515-0000-00"
-        )
-    
-    with st.container(border=True):
-        st.subheader("3. Controle de Processamento")
-        b_cols = st.columns(2)
-        process_clicked = b_cols[0].button("Processar Arquivo", type="primary", use_container_width=True)
-        if b_cols[1].button("Resetar Campos", use_container_width=True):
-            st.session_state["version"] += 1
-            st.rerun()
-
-    if "available_columns" in st.session_state:
-        with st.container(border=True):
-            st.markdown(f'<div style="background-color: var(--light-green-card); padding: 0 0 10px 0; border-radius: 12px 12px 0 0;">', unsafe_allow_html=True)
-            head_cols = st.columns([1,1])
-            head_cols[0].markdown("<h3 style='margin-top: 0;'>4. Selecionar Colunas</h3>", unsafe_allow_html=True)
-            if head_cols[1].button("Resetar Seleção", key="reset_cols", use_container_width=True):
-                for col in st.session_state.available_columns:
-                    st.session_state[f"col_select_{col}"] = True
-                st.session_state.select_all_cols = True
-                st.rerun()
-            st.markdown('</div>', unsafe_allow_html=True)
-            
-            st.markdown(f'<div style="background-color: var(--light-green-card); padding: 0 25px 0 25px; border-radius: 0 0 12px 12px;">', unsafe_allow_html=True)
-            select_all = st.checkbox("Selecionar todas", key="select_all_cols", value=st.session_state.get("select_all_cols", True))
-            st.markdown("---")
-            all_cols = st.session_state.available_columns
-            mid_point = math.ceil(len(all_cols) / 2)
-            c1, c2 = st.columns(2)
-            
-            def update_select_all():
-                st.session_state.select_all_cols = all(st.session_state.get(f"col_select_{c}", True) for c in all_cols)
-
-            for i, col_name in enumerate(all_cols):
-                container = c1 if i < mid_point else c2
-                default_val = select_all if f"col_select_{col_name}" not in st.session_state else st.session_state.get(f"col_select_{col_name}", True)
-                container.checkbox(col_name, value=default_val, key=f"col_select_{col_name}", on_change=update_select_all)
-
-            st.session_state.selected_columns = [c for c in all_cols if st.session_state.get(f"col_select_{c}", True)]
-            st.markdown("---")
-            st.caption(f"**{len(st.session_state.selected_columns)} de {len(all_cols)} colunas selecionadas**")
-            st.markdown('</div>', unsafe_allow_html=True)
-
-if "last_df_processed" in st.session_state:
-    st.markdown("---")
-    st.subheader("Resultados")
-    with st.container(border=True):
-        st.markdown('<div class="card-dark-results" style="padding: 20px; border-radius: 12px;">', unsafe_allow_html=True)
-        st.write("<h3 style='color:white;'>📄 Dados Processados</h3>", unsafe_allow_html=True)
-        dl_cols = st.columns(2)
-        df_to_export = pd.read_json(io.StringIO(st.session_state["last_df_processed"]), orient='split')[st.session_state.selected_columns]
-        t = datetime.now().strftime("%Y%m%d_%H%M%S")
-        excel_data = to_excel(df_to_export)
-        csv_data = df_to_export.to_csv(index=False).encode("utf-8")
-        dl_cols[0].download_button("📥 Baixar Excel (.xlsx)", excel_data, f"lista_codificada_{t}.xlsx")
-        dl_cols[1].download_button("📥 Baixar CSV (.csv)", csv_data, f"lista_codificada_{t}.csv")
-        st.dataframe(df_to_export, use_container_width=True, height=500)
-        st.markdown('</div>', unsafe_allow_html=True)
-
-if process_clicked:
-    if uploaded_file is None:
-        st.toast("⚠️ Por favor, carregue um arquivo.", icon="⚠️")
-    elif not main_assembly_code:
-        st.toast("⚠️ Por favor, insira o Código do Conjunto Principal.", icon="⚠️")
-    else:
-        sequentials = {g: int(st.session_state.get(f"seq_{g}_v{version}", 0)) for g in group_table.keys()}
-        try:
-            with st.spinner("Processando..."):
-                df_raw, column_report, _ = load_data(uploaded_file)
-                if df_raw is not None:
-                    # Passando o novo código para a função de processamento
-                    df_proc, report = process_codes(df_raw.copy(), sequentials, json_state, column_report, main_assembly_code)
-                    st.session_state["last_report"] = report
-                    st.session_state["last_df_processed"] = df_proc.to_json(orient='split', date_format='iso')
-                    st.session_state["available_columns"] = df_proc.columns.tolist()
-                    for col in df_proc.columns.tolist():
-                        st.session_state[f"col_select_{col}"] = True
-                    st.session_state.select_all_cols = True
-            st.toast("✅ Processamento concluído!", icon="🎉")
-            st.rerun()
-        except Exception as e:
-            st.error(f"Ocorreu um erro: {e}", icon="❌")
+import streamlit as st
+import pandas as pd
+from datetime import datetime
+import math
+import os
+import base64
+import uuid
+import re
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from bom_processor import GROUP_TABLE, MAX_SEQ, AssemblyRevisions, SequenceStore, StageTimer, lazy_export, list_sheets, load_data, load_sequentials, process_codes
+
+ALL_SHEETS = "Todas as abas (listas separadas)"
+
+# --- Estilo ---
+st.set_page_config(layout="wide", page_title="SolidWorks BOM Processor")
+
+# Função para converter imagens para base64
+def get_image_as_base64(path):
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        return base64.b64encode(data).decode()
+    except IOError:
+        return None
+
+# SVG do ícone do cabeçalho
+icon_svg = """
+<svg xmlns="http://www.w3.org/2000/svg" width="32" height="32" fill="currentColor" class="bi bi-file-earmark-spreadsheet-fill" viewBox="0 0 16 16">
+  <path d="M6 12v-2h3v2H6z"/>
+  <path d="M9.293 0H4a2 2 0 0 0-2 2v12a2 2 0 0 0 2 2h8a2 2 0 0 0 2-2V4.707A1 1 0 0 0 13.707 4L10 .293A1 1 0 0 0 9.293 0zM9.5 3.5v-2l3 3h-2a1 1 0 0 1-1-1zM3 9h10v1h-3v2h3v1h-3v2H9v-2H6v2H5v-2H3v-1h2v-2H3V9z"/>
+</svg>
+"""
+
+@st.cache_resource
+def page_assets():
+    """CSS (com a imagem do cabeçalho em base64) e HTML do banner, montados uma vez por processo do servidor."""
+    # Carregando a imagem de fundo do novo cabeçalho
+    header_bg_base64 = get_image_as_base64("header_bg.jpg")
+
+    # Estilo para o cabeçalho
+    header_style = ""
+    if header_bg_base64:
+        header_style = f"""
+            background-image: linear-gradient(rgba(90, 102, 61, 0.9), rgba(90, 102, 61, 0.9)), url(data:image/jpeg;base64,{header_bg_base64});
+        """
+    else:
+        header_style = "background: linear-gradient(45deg, #5a663d, #7E8C54);"
+
+    style_html = f"""
+<style>
+    :root {{
+        --main-bg-color: #A3CB38;
+        --accent-teal: #008080;
+        --light-green-card: #e6f3d8;
+        --upload-button-color: #B3D10D;
+        --upload-button-text-color: #2D2D2D;
+    }}
+    .stApp {{ background-color: var(--main-bg-color); }}
+    h1, h2, h3 {{ color: #1a202c !important; }}
+    .banner-header {{ display: flex; align-items: center; gap: 20px; padding: 1.5rem; border-radius: 12px; margin-bottom: 2rem; color: white; {header_style} background-size: cover; background-position: center; }}
+    .banner-icon {{ background-color: var(--upload-button-color); border-radius: 50%; width: 64px; height: 64px; display: flex; align-items: center; justify-content: center; flex-shrink: 0; }}
+    .banner-icon svg {{ color: var(--upload-button-text-color); }}
+    .banner-text h1 {{ font-size: 2.2rem; font-weight: 700; color: #FFFFFF !important; margin: 0; line-height: 1.2; }}
+    .banner-text p {{ font-size: 1.1rem; color: rgba(255, 255, 255, 0.9) !important; margin: 0; }}
+    .st-emotion-cache-eah9w0 {{ background-color: #FFFFFF; border: 1px solid #c3d9a5; border-radius: 12px; padding: 25px; box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.05), 0 2px 4px -1px rgba(0, 0, 0, 0.04); margin-bottom: 20px; }}
+    .upload-box, .card-dark-results {{ background-color: var(--accent-teal); color: #FFFFFF; border-radius: 12px; padding: 1.5rem; }}
+    .upload-box h1, .upload-box h2, .upload-box h3, .upload-box p, .upload-box small,
+    .card-dark-results h1, .card-dark-results h2, .card-dark-results h3, .card-dark-results p, .card-dark-results small {{ color: #FFFFFF !important; }}
+    .stButton > button {{ border-radius: 8px; padding: 8px 20px; font-weight: 600; transition: all 0.2s ease-in-out; width: 100%; }}
+    .stButton > button:hover {{ filter: brightness(1.1); }}
+    .stButton[data-testid="stFormSubmitButton"] > button,
+    .stButton:has( > [data-testid="stMarkdownContainer"] :contains("Resetar Campos")) > button,
+    .stButton:has( > [data-testid="stMarkdownContainer"] :contains("Resetar Seleção")) > button {{ background-color: var(--accent-teal) !important; color: #FFFFFF !important; border: 1px solid var(--accent-teal) !important; }}
+    .stButton[data-testid="stFormSubmitButton"] > button:hover,
+    .stButton:has( > [data-testid="stMarkdownContainer"] :contains("Resetar Campos")) > button:hover,
+    .stButton:has( > [data-testid="stMarkdownContainer"] :contains("Resetar Seleção")) > button:hover {{ background-color: var(--accent-teal) !important; filter: brightness(1.1); }}
+    .upload-box [data-testid="stFileUploader"] {{ border: 2px dashed #4E8A96; border-radius: 8px; }}
+    .upload-box [data-testid="stFileUploader"] section {{ padding: 2rem 1rem; background-color: transparent; border: none; }}
+    .upload-box [data-testid="stFileUploader"] button {{ background-color: var(--upload-button-color) !important; color: var(--upload-button-text-color) !important; border: none !important; border-radius: 8px !important; font-weight: 600 !important; padding: 10px 24px !important; }}
+    .upload-box [data-testid="stFileUploader"] small {{ color: rgba(255, 255, 255, 0.8); }}
+    .formatos-suportados {{ text-align: left; margin-top: 1.5rem; font-size: 0.9rem; color: rgba(255, 255, 255, 0.9); }}
+    .formatos-suportados strong {{ color: white; }} .formatos-suportados li {{ margin-left: 20px; }}
+    .report-container {{ max-height: 400px; overflow-y: auto; padding-right: 10px; }}
+    .report-item {{ display: flex; align-items: center; padding: 12px; margin-bottom: 8px; border-radius: 8px; border: 1px solid; }}
+    .report-item-icon {{ display: flex; justify-content: center; align-items: center; min-width: 24px; height: 24px; border-radius: 50%; margin-right: 12px; font-weight: bold; color: white; }}
+    .report-item-success {{ background-color: #e6f3d8; border-color: #c3d9a5; }} .report-item-success .report-item-icon {{ background-color: #6E9B44; }}
+    .report-item-info {{ background-color: #e0f2f7; border-color: #a0c4d1; }} .report-item-info .report-item-icon {{ background-color: #007B9E; }}
+    .report-item-warning {{ background-color: #fff3cd; border-color: #ffda77; }} .report-item-warning .report-item-icon {{ background-color: #FFAA00; }}
+    .stDownloadButton > button {{ background-color: var(--upload-button-color) !important; color: var(--upload-button-text-color) !important; font-size: 1.1rem !important; font-weight: 700 !important; padding: 1rem !important; border-radius: 12px !important; border: none !important; width: 100%; }}
+    .stDownloadButton > button:hover {{ filter: brightness(1.05); color: #000 !important; }}
+    [data-testid="stNumberInput"] > div > input {{ background-color: var(--upload-button-color) !important; color: var(--upload-button-text-color) !important; border: none !important; border-radius: 8px !important; padding: 8px 12px !important; font-weight: 600 !important; }}
+    [data-testid="stNumberInput"] > div > input:focus {{ box-shadow: 0 0 0 2px var(--accent-teal) !important; }}
+</style>
+"""
+
+    banner_html = f"""
+<div class="banner-header">
+    <div class="banner-icon">{icon_svg}</div>
+    <div class="banner-text">
+        <h1>SolidWorks BOM Processor</h1>
+        <p>Processamento automático de listas de materiais exportadas do SolidWorks</p>
+    </div>
+</div>
+"""
+    return style_html, banner_html
+
+style_html, banner_html = page_assets()
+st.markdown(style_html, unsafe_allow_html=True)
+
+# --- Armazenamento do resultado ---
+def compact_table(table):
+    # Colunas de texto com muitos valores repetidos (PROCESSO, GRUPO, CÓDIGO PAI...) viram dicionário
+    for i, field in enumerate(table.schema):
+        if not (pa.types.is_string(field.type) or pa.types.is_large_string(field.type)): continue
+        col = table.column(i)
+        if len(col) and pc.count_distinct(col).as_py() <= len(col) // 2:
+            table = table.set_column(i, field.name, pc.dictionary_encode(col))
+    return table
+
+def store_results(results):
+    """Guarda os resultados [(rótulo, df)] na sessão como tabelas Arrow e devolve os identificadores."""
+    store, labels = {}, {}
+    for label, df in results:
+        result_id = uuid.uuid4().hex
+        store[result_id] = compact_table(pa.Table.from_pandas(df, preserve_index=False))
+        labels[result_id] = label
+    # Só os resultados do último processamento ficam na sessão; os anteriores são liberados
+    st.session_state["result_store"] = store
+    st.session_state["result_labels"] = labels
+    return list(store)
+
+def get_result(result_id, columns=None):
+    """Projeção (sem cópia) das colunas pedidas do resultado guardado."""
+    table = st.session_state.get("result_store", {}).get(result_id)
+    if table is None or columns is None: return table
+    return table.select([c for c in columns if c in table.column_names])
+
+def xlsx_sheet_names(uploaded_file):
+    cache = st.session_state.setdefault("sheet_names", {})
+    if uploaded_file.file_id not in cache:
+        try: cache[uploaded_file.file_id] = list_sheets(uploaded_file.getvalue())
+        except Exception: cache[uploaded_file.file_id] = []
+    return cache[uploaded_file.file_id]
+
+# --- Sequenciais ---
+def app_secrets():
+    try: return st.secrets.to_dict()
+    except FileNotFoundError: return {}
+
+@st.cache_resource
+def shared_sequence_store():
+    """Realtime Database quando `sequence_backend = "firebase"` (secrets ou BOM_SEQ_BACKEND); senão None.
+
+    A URL vem de `firebase_database_url` (ou FIREBASE_DATABASE_URL); sem ela,
+    usa a instância padrão do projeto das credenciais. Um nó ainda vazio
+    recebe os sequenciais do estado_sequenciais.db local.
+    """
+    secrets = app_secrets()
+    if secrets.get("sequence_backend", os.environ.get("BOM_SEQ_BACKEND", "sqlite")) != "firebase": return None
+    import bom_firebase
+    credentials = secrets["firebase_credentials"]
+    url = secrets.get("firebase_database_url") or os.environ.get("FIREBASE_DATABASE_URL") or bom_firebase.default_database_url(credentials["project_id"])
+    return bom_firebase.connect(credentials, url, seed=load_sequentials())
+
+def open_sequence_store():
+    # O store do Firebase é compartilhado pelo processo; o SQLite abre uma conexão por uso
+    return shared_sequence_store() or SequenceStore()
+
+def session_sequentials():
+    # Lidos do store uma vez por sessão; recarregados ao resetar os campos e depois de processar
+    if "json_state" not in st.session_state:
+        with open_sequence_store() as store: st.session_state["json_state"] = store.load()
+    return st.session_state["json_state"]
+
+# --- Interface --- #
+st.markdown(banner_html, unsafe_allow_html=True)
+
+col1, col2 = st.columns([5, 7])
+
+@st.fragment
+def group_table_panel(version):
+    # Fragmento: alterar um número reexecuta só este painel
+    json_state = session_sequentials()
+    t_cols = st.columns([1, 2, 2])
+    t_cols[0].markdown("**Grupo**")
+    t_cols[1].markdown("**Descrição**")
+    t_cols[2].markdown("**Próximo Nº**")
+    for g, desc in group_table.items():
+        g_cols = st.columns([1, 2, 2])
+        g_cols[0].write(f"`{g}`")
+        g_cols[1].write(desc)
+        key = f"seq_{g}_v{version}"
+        init_val = int(st.session_state.get(key, json_state.get(g, 0)))
+        g_cols[2].number_input(f"seq_{g}", min_value=0, max_value=MAX_SEQ, value=init_val, step=1, key=key, label_visibility="collapsed")
+
+with col1:
+    with st.container(border=True):
+        st.subheader("⚙️ Tabela de Grupos")
+        group_table = GROUP_TABLE
+        if "version" not in st.session_state: st.session_state["version"] = 0
+        version = st.session_state["version"]
+        group_table_panel(version)
+
+    if "last_report" in st.session_state:
+        with st.container(border=True):
+            st.subheader("📊 Relatório de Processamento")
+            st.markdown('<div class="report-container">', unsafe_allow_html=True)
+            for log in st.session_state["last_report"]:
+                if log.startswith("✅"): st.markdown(f'<div class="report-item report-item-success"><div class="report-item-icon">✓</div><div>{log[2:]}</div></div>', unsafe_allow_html=True)
+                elif log.startswith("✔️"): st.markdown(f'<div class="report-item report-item-success"><div class="report-item-icon">✓</div><div>{log[2:]}</div></div>', unsafe_allow_html=True)
+                elif log.startswith("⚠️"): st.markdown(f'<div class="report-item report-item-warning"><div class="report-item-icon">!</div><div>{log[2:]}</div></div>', unsafe_allow_html=True)
+                else: st.markdown(f'<div class="report-item report-item-info"><div class="report-item-icon">i</div><div>{log}</div></div>', unsafe_allow_html=True)
+            st.markdown('</div>', unsafe_allow_html=True)
+            if timings := st.session_state.get("last_timings"):
+                with st.expander("⏱️ Tempos de processamento"):
+                    st.dataframe(pd.DataFrame(timings), hide_index=True, use_container_width=True)
+                    st.caption("Tempo de parede, linhas por segundo e pico de memória alocada (MB) por etapa. Os tempos de exportação são gravados no log ao baixar.")
+
+with col2:
+    with st.container(border=True):
+        st.markdown('<div class="upload-box">', unsafe_allow_html=True)
+        st.subheader("1. Carregar Arquivo")
+        uploaded_file = st.file_uploader(
+            "Arraste e solte seu arquivo aqui ou clique para selecionar",
+            type=['txt', 'xlsx']
+        )
+        sheets, sheet_choice = [0], 0
+        if uploaded_file is not None and uploaded_file.name.lower().endswith(".xlsx"):
+            sheets = xlsx_sheet_names(uploaded_file) or [0]
+            sheet_choice = st.selectbox("Aba da planilha", sheets + [ALL_SHEETS]) if len(sheets) > 1 else sheets[0]
+        st.markdown("""
+        <div class="formatos-suportados">
+            <strong>Formatos suportados:</strong>
+            <ul><li>TXT e XLSX</li></ul>
+        </div>
+        """, unsafe_allow_html=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    # ==============================================================================
+    # ======================== NOVO CAMPO ADICIONADO AQUI ==========================
+    # ==============================================================================
+    with st.container(border=True):
+        st.subheader("2. Informação do Conjunto")
+        main_assembly_code = st.text_input(
+            "Código do Conjunto Principal",
+            help="Insira o código do conjunto principal (ex: 10-3515-0000-00). Ele será usado como 'Código Pai' para os itens de nível superior.",
+            placeholder="Ex: 10-3515-0000-00"
+        )
+    
+    with st.container(border=True):
+        st.subheader("3. Controle de Processamento")
+        b_cols = st.columns(2)
+        process_clicked = b_cols[0].button("Processar Arquivo", type="primary", use_container_width=True)
+        if b_cols[1].button("Resetar Campos", use_container_width=True):
+            st.session_state["version"] += 1
+            st.session_state.pop("json_state", None)
+            st.rerun()
+
+@st.fragment
+def results_panel(labels):
+    # Fragmento: marcar colunas ou trocar a aba reexecuta só a seleção e a tabela, não o script inteiro
+    with st.container(border=True):
+        st.markdown(f'<div style="background-color: var(--light-green-card); padding: 0 0 10px 0; border-radius: 12px 12px 0 0;">', unsafe_allow_html=True)
+        head_cols = st.columns([1,1])
+        head_cols[0].markdown("<h3 style='margin-top: 0;'>4. Selecionar Colunas</h3>", unsafe_allow_html=True)
+        if head_cols[1].button("Resetar Seleção", key="reset_cols", use_container_width=True):
+            for col in st.session_state.available_columns:
+                st.session_state[f"col_select_{col}"] = True
+            st.session_state.select_all_cols = True
+        st.markdown('</div>', unsafe_allow_html=True)
+        
+        st.markdown(f'<div style="background-color: var(--light-green-card); padding: 0 25px 0 25px; border-radius: 0 0 12px 12px;">', unsafe_allow_html=True)
+        select_all = st.checkbox("Selecionar todas", key="select_all_cols", value=st.session_state.get("select_all_cols", True))
+        st.markdown("---")
+        all_cols = st.session_state.available_columns
+        mid_point = math.ceil(len(all_cols) / 2)
+        c1, c2 = st.columns(2)
+        
+        def update_select_all():
+            st.session_state.select_all_cols = all(st.session_state.get(f"col_select_{c}", True) for c in all_cols)
+
+        for i, col_name in enumerate(all_cols):
+            container = c1 if i < mid_point else c2
+            default_val = select_all if f"col_select_{col_name}" not in st.session_state else st.session_state.get(f"col_select_{col_name}", True)
+            container.checkbox(col_name, value=default_val, key=f"col_select_{col_name}", on_change=update_select_all)
+
+        st.session_state.selected_columns = [c for c in all_cols if st.session_state.get(f"col_select_{c}", True)]
+        st.markdown("---")
+        st.caption(f"**{len(st.session_state.selected_columns)} de {len(all_cols)} colunas selecionadas**")
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    with st.container(border=True):
+        st.markdown('<div class="card-dark-results" style="padding: 20px; border-radius: 12px;">', unsafe_allow_html=True)
+        st.write("<h3 style='color:white;'>📄 Dados Processados</h3>", unsafe_allow_html=True)
+        result_id = st.selectbox("Aba processada", list(labels), format_func=labels.get) if len(labels) > 1 else next(iter(labels))
+        result = get_result(result_id, st.session_state.get("selected_columns"))
+        dl_cols = st.columns(2)
+        t = datetime.now().strftime("%Y%m%d_%H%M%S")
+        suffix = f"_{re.sub(r'[^0-9A-Za-z]+', '_', str(labels[result_id]))}" if len(labels) > 1 else ""
+        dl_cols[0].download_button("📥 Baixar Excel (.xlsx)", lazy_export(result_id, result, "xlsx"), f"lista_codificada{suffix}_{t}.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        dl_cols[1].download_button("📥 Baixar CSV (.csv)", lazy_export(result_id, result, "csv"), f"lista_codificada{suffix}_{t}.csv", mime="text/csv")
+        st.dataframe(result, use_container_width=True, height=500)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+if labels := st.session_state.get("result_labels"):
+    st.markdown("---")
+    st.subheader("Resultados")
+    results_panel(labels)
+
+if process_clicked:
+    if uploaded_file is None:
+        st.toast("⚠️ Por favor, carregue um arquivo.", icon="⚠️")
+    elif not main_assembly_code:
+        st.toast("⚠️ Por favor, insira o Código do Conjunto Principal.", icon="⚠️")
+    else:
+        sequentials = {g: int(st.session_state.get(f"seq_{g}_v{version}", 0)) for g in group_table.keys()}
+        try:
+            with st.spinner("Processando..."), open_sequence_store() as store:
+                # Estado atual do store (outra sessão pode ter processado depois do último carregamento)
+                json_state = store.load()
+                sheet_names = sheets if sheet_choice == ALL_SHEETS else [sheet_choice]
+                results, report, timings = [], [], []
+                # Cada aba é uma lista própria: a revisão anterior é procurada por conjunto + aba
+                with AssemblyRevisions() as revisions:
+                    for sheet in sheet_names:
+                        timer = StageTimer()
+                        df_raw, column_report, load_message = load_data(uploaded_file, sheet, timer)
+                        if df_raw is None:
+                            if column_report: st.error(load_message)
+                            continue
+                        # Passando o novo código para a função de processamento
+                        df_proc, sheet_report = process_codes(df_raw.copy(), sequentials, json_state, column_report, main_assembly_code, store=store, timer=timer, compact=True,
+                                                              revisions=revisions, assembly_key=f"{main_assembly_code} [{sheet}]" if len(sheet_names) > 1 else None)
+                        if len(sheet_names) > 1: report.append(f"📄 Aba '{sheet}'")
+                        report += sheet_report
+                        results.append((sheet, df_proc))
+                        timer.write_log(arquivo=uploaded_file.name, aba=sheet)
+                        timings += [{"aba": sheet, **t} if len(sheet_names) > 1 else t for t in timer.stages]
+                st.session_state["json_state"] = store.load()
+                if results:
+                    st.session_state["last_report"] = report
+                    st.session_state["last_timings"] = timings
+                    store_results(results)
+                    columns = list(dict.fromkeys(c for _, df_proc in results for c in df_proc.columns))
+                    st.session_state["available_columns"] = columns
+                    for col in columns:
+                        st.session_state[f"col_select_{col}"] = True
+                    st.session_state.select_all_cols = True
+            st.toast("✅ Processamento concluído!", icon="🎉")
+            st.rerun()
+        except Exception as e:
+            st.error(f"Ocorreu um erro: {e}", icon="❌")
@@ -0,0 +1,147 @@
+"""Processamento em lote (sem interface) de uma pasta de exportações de BOM.
+
+Uso:
+    python bom_batch.py PASTA_ENTRADA [-o PASTA_SAIDA] [--conjunto CODIGO] [--formato xlsx|csv] [--workers N] [--aba NOME|todas]
+
+Cada arquivo .txt/.xlsx gera um arquivo de saída com o mesmo nome; com
+`--aba todas`, cada aba de um .xlsx é tratada como uma lista separada e gera
+`<arquivo>_<aba>`. Arquivos com o mesmo nome e extensões diferentes
+(X.txt e X.xlsx) são recusados, já que gerariam a mesma saída. Os
+sequenciais ficam no mesmo estado_sequenciais.db usado pelo app; cada worker reserva blocos de códigos por grupo e por arquivo numa
+transação própria, então os processos nunca geram códigos repetidos.
+Sem `--conjunto`, cada arquivo é tratado como nova revisão do conjunto com o
+seu nome: comerciais já codificados numa execução anterior mantêm o código.
+Os tempos de cada etapa vão para logs/etapas.jsonl, o mesmo log do app.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pyarrow as pa
+
+from bom_processor import EXPORTERS, GROUP_TABLE, SEQ_DB_FILE, AssemblyRevisions, SequenceStore, StageTimer, list_sheets, load_bytes, process_codes
+
+INPUT_EXTENSIONS = (".txt", ".xlsx")
+ALL_SHEETS = "todas"
+
+def _process_sheet(content_bytes, name, sheet, out_name, output_dir, fmt, main_code, db_path, assembly_key=None):
+    started = time.perf_counter()
+    result = {"arquivo": name, "linhas": 0, "status": "ok", "mensagens": []}
+    if sheet != 0: result["aba"] = sheet
+    timer = StageTimer()
+    try:
+        df_raw, column_report, load_message = load_bytes(content_bytes, name, sheet, timer)
+        if df_raw is None:
+            result.update(status="erro", mensagens=column_report or [load_message])
+        else:
+            with SequenceStore(db_path) as store, AssemblyRevisions(db_path) as revisions:
+                sequentials = {g: 0 for g in GROUP_TABLE}
+                df_proc, report = process_codes(df_raw, sequentials, store.load(), column_report, main_code, store=store, timer=timer, compact=True,
+                                                revisions=revisions if assembly_key else None, assembly_key=assembly_key)
+            out_path = os.path.join(output_dir, f"{out_name}.{fmt}")
+            with timer.stage(f"exportação {fmt}", len(df_proc)):
+                data = EXPORTERS[fmt](pa.Table.from_pandas(df_proc, preserve_index=False))
+            with open(out_path, "wb") as f:
+                f.write(data)
+            result.update(linhas=len(df_proc), mensagens=report, saida=out_path)
+    except Exception as e:
+        result.update(status="erro", mensagens=[f"❌ {e}"])
+    result["segundos"] = round(time.perf_counter() - started, 3)
+    timer.write_log(arquivo=name, aba=sheet, origem="lote")
+    return result
+
+def process_file(path, output_dir, fmt, main_assembly_code=None, db_path=SEQ_DB_FILE, sheet=0):
+    name = os.path.basename(path)
+    stem = os.path.splitext(name)[0]
+    # Sem --conjunto, o nome do arquivo é usado como código do conjunto principal e cada
+    # arquivo é comparado com a revisão anterior dele. Com --conjunto, todos os arquivos
+    # dividiriam o mesmo conjunto, então não há comparação entre revisões.
+    main_code = main_assembly_code or stem
+    key = None if main_assembly_code else stem
+    with open(path, "rb") as f:
+        content_bytes = f.read()
+    if sheet == ALL_SHEETS and name.lower().endswith(".xlsx"):
+        try:
+            sheets = list_sheets(content_bytes)
+        except Exception as e:
+            return [{"arquivo": name, "linhas": 0, "status": "erro", "mensagens": [f"❌ {e}"], "segundos": 0}]
+        return [_process_sheet(content_bytes, name, s, f"{stem}_{s}", output_dir, fmt, main_code, db_path, key and f"{key} [{s}]")
+                for s in sheets]
+    return [_process_sheet(content_bytes, name, 0 if sheet == ALL_SHEETS else sheet, stem, output_dir, fmt, main_code, db_path, key)]
+
+def find_inputs(input_dir):
+    return sorted(
+        os.path.join(input_dir, n) for n in os.listdir(input_dir)
+        if n.lower().endswith(INPUT_EXTENSIONS) and os.path.isfile(os.path.join(input_dir, n))
+    )
+
+def stem_clashes(paths):
+    """Arquivos cujo nome sem extensão se repete na pasta (X.txt e X.xlsx).
+
+    A saída e o conjunto da revisão vêm do nome sem extensão, então esses
+    arquivos gravariam o mesmo arquivo de saída e se confundiriam como
+    revisões do mesmo conjunto. A comparação ignora maiúsculas, como no Windows.
+    """
+    stems = Counter(os.path.splitext(os.path.basename(p))[0].lower() for p in paths)
+    return {p for p in paths if stems[os.path.splitext(os.path.basename(p))[0].lower()] > 1}
+
+def run_batch(input_dir, output_dir, fmt="xlsx", main_assembly_code=None, workers=None, db_path=SEQ_DB_FILE, sheet=0):
+    paths = find_inputs(input_dir)
+    clashes = stem_clashes(paths)
+    os.makedirs(output_dir, exist_ok=True)
+    # Cria o banco (e migra o JSON antigo) antes de abrir os workers
+    SequenceStore(db_path).close()
+    AssemblyRevisions(db_path).close()
+
+    started = time.perf_counter()
+    results = []
+    for p in sorted(clashes):
+        name = os.path.basename(p)
+        results.append({"arquivo": name, "linhas": 0, "status": "erro", "segundos": 0,
+                        "mensagens": [f"❌ Outro arquivo da pasta tem o mesmo nome sem extensão que {name}; renomeie um deles."]})
+        print(f"[erro] {name}: nome repetido, arquivo ignorado", flush=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(process_file, p, output_dir, fmt, main_assembly_code, db_path, sheet) for p in paths if p not in clashes]
+        for future in as_completed(futures):
+            for r in future.result():
+                results.append(r)
+                where = f"{r['arquivo']} [{r['aba']}]" if "aba" in r else r["arquivo"]
+                print(f"[{r['status']}] {where}: {r['linhas']} linhas em {r['segundos']}s", flush=True)
+    elapsed = time.perf_counter() - started
+
+    summary = {
+        "arquivos": len(paths),
+        "listas": len(results),
+        "erros": sum(r["status"] != "ok" for r in results),
+        "linhas": sum(r["linhas"] for r in results),
+        "segundos": round(elapsed, 3),
+        "arquivos_por_segundo": round(len(paths) / elapsed, 2) if elapsed else None,
+        "resultados": sorted(results, key=lambda r: (r["arquivo"], str(r.get("aba", "")))),
+    }
+    with open(os.path.join(output_dir, "resumo_lote.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=4, ensure_ascii=False)
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Processa uma pasta de listas de materiais exportadas do SolidWorks.")
+    parser.add_argument("entrada", help="pasta com os arquivos .txt/.xlsx")
+    parser.add_argument("-o", "--saida", help="pasta de saída (padrão: <entrada>/processados)")
+    parser.add_argument("--conjunto", help="código do conjunto principal (padrão: nome de cada arquivo)")
+    parser.add_argument("--formato", choices=sorted(EXPORTERS), default="xlsx")
+    parser.add_argument("--workers", type=int, default=None, help="número de processos (padrão: núcleos da máquina)")
+    parser.add_argument("--aba", default=None, help=f"aba dos arquivos .xlsx (padrão: a primeira; '{ALL_SHEETS}' processa cada aba como uma lista)")
+    parser.add_argument("--db", default=SEQ_DB_FILE, help="banco de sequenciais compartilhado com o app")
+    args = parser.parse_args(argv)
+
+    output_dir = args.saida or os.path.join(args.entrada, "processados")
+    summary = run_batch(args.entrada, output_dir, args.formato, args.conjunto, args.workers, args.db, args.aba if args.aba is not None else 0)
+    print(f"{summary['arquivos']} arquivos ({summary['erros']} com erro), {summary['linhas']} linhas "
+          f"em {summary['segundos']}s: {summary['arquivos_por_segundo']} arquivos/s")
+    return 1 if summary["erros"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""Benchmark das etapas load_data, process_codes e exportação com BOMs sintéticas.
+
+Cada etapa roda uma vez cronometrada e uma vez sob tracemalloc (pico de
+memória alocada pelo Python/NumPy; buffers do Arrow não entram na conta).
+Os resultados saem numa tabela e, com --saida, em JSON lines para comparar
+execuções entre versões.
+
+Uso:
+    python bom_benchmark.py [--linhas 1000 10000 100000 500000] [--xlsx-max 100000] [--saida bench.jsonl]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import pyarrow as pa
+
+from bom_processor import GROUP_TABLE, SequenceStore, parse_upload, process_codes, to_csv, to_excel
+from bom_synthetic import generate_bom, to_solidworks_txt, to_xlsx
+
+DEFAULT_ROWS = [1_000, 10_000, 100_000, 500_000]
+
+def measure(fn):
+    """Executa `fn` duas vezes: uma para o tempo e outra para o pico de memória."""
+    started = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - started
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return seconds, peak
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(row_counts=DEFAULT_ROWS, xlsx_max=100_000, seed=0, **bom_options):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        for rows in row_counts:
+            bom = generate_bom(rows, seed=seed, **bom_options)
+            txt = to_solidworks_txt(bom)
+            df_raw = parse_upload(txt, "bench.txt")[0]
+
+            def run_process():
+                # Banco novo a cada execução para que as duas medições façam o mesmo trabalho
+                if os.path.exists(db_path): os.remove(db_path)
+                with SequenceStore(db_path, legacy_json=None) as store:
+                    return process_codes(df_raw.copy(), {g: 0 for g in GROUP_TABLE}, {}, [], "10-0000-0000-00", store=store)[0]
+
+            table = pa.Table.from_pandas(run_process(), preserve_index=False)
+            stages = [
+                ("load_data (txt)", lambda: parse_upload(txt, "bench.txt")),
+                ("process_codes", run_process),
+                ("to_excel", lambda: to_excel(table)),
+                ("to_csv", lambda: to_csv(table)),
+            ]
+            if rows <= xlsx_max:
+                xlsx = to_xlsx(bom)
+                stages.insert(1, ("load_data (xlsx)", lambda: parse_upload(xlsx, "bench.xlsx")))
+
+            for stage, fn in stages:
+                seconds, peak = measure(fn)
+                results.append({
+                    "etapa": stage, "linhas": rows, "segundos": round(seconds, 4),
+                    "linhas_por_segundo": round(rows / seconds) if seconds else None,
+                    "pico_mb": round(peak / 1e6, 1),
+                })
+                print(f"{stage:<18} {rows:>8} linhas {seconds:>9.3f}s {results[-1]['linhas_por_segundo'] or 0:>10} linhas/s {results[-1]['pico_mb']:>8.1f} MB", flush=True)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede tempo e memória por etapa com BOMs sintéticas.")
+    parser.add_argument("--linhas", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--xlsx-max", type=int, default=100_000, help="maior lista usada no teste de leitura xlsx")
+    parser.add_argument("--profundidade", type=int, default=4)
+    parser.add_argument("--fabricado", type=float, default=0.4)
+    parser.add_argument("--existentes", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--saida", help="acrescenta os resultados em JSON lines neste arquivo")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.linhas, args.xlsx_max, args.seed, max_depth=args.profundidade,
+                             fabricado_share=args.fabricado, existing_code_share=args.existentes)
+    if args.saida:
+        context = {"data": datetime.now().isoformat(timespec="seconds"), "revisao": _git_revision(),
+                   "python": platform.python_version()}
+        with open(args.saida, "a", encoding="utf-8") as f:
+            for r in results:
+                f.write(json.dumps({**context, **r}, ensure_ascii=False) + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Sequenciais no Firebase Realtime Database, compartilhados entre réplicas do app.
+
+`RealtimeDatabaseStore` tem a mesma interface do SequenceStore (SQLite):
+load, raise_to, reserve, reserve_many e close. Cada reserva é uma transação
+do Realtime Database sobre o nó dos sequenciais e entrega um bloco inteiro
+de códigos; reserve_many reserva os blocos de vários grupos numa única
+transação, então um processamento faz uma ida ao servidor, não uma por código.
+
+`InMemoryReference` imita a parte usada de firebase_admin.db.Reference
+(get com ETag, set_if_unchanged e transaction com as mesmas tentativas),
+com latência opcional por ida ao servidor. Serve para testar o store e para
+o bom_store_benchmark.py sem rede.
+"""
+import copy
+import random
+import threading
+import time
+
+from bom_processor import MAX_SEQ
+
+try:
+    from firebase_admin.db import TransactionAbortedError
+except ImportError:
+    class TransactionAbortedError(Exception):
+        pass
+
+RTDB_PATH = "sequenciais"
+FIREBASE_APP_NAME = "bom-sequenciais"
+TRANSACTION_MAX_RETRIES = 25  # mesmo limite do firebase_admin
+# Com muitas réplicas gravando ao mesmo tempo, as 25 tentativas do cliente podem se esgotar;
+# a transação inteira é repetida após uma espera aleatória crescente
+TRANSACTION_ATTEMPTS = 5
+TRANSACTION_BACKOFF = 0.05
+
+def _as_dict(value):
+    # O Realtime Database devolve como lista um nó com chaves numéricas densas
+    if isinstance(value, list): return {str(i): v for i, v in enumerate(value) if v is not None}
+    return dict(value or {})
+
+class RealtimeDatabaseStore:
+    """Estado dos sequenciais num nó do Realtime Database ({grupo: último sequencial}).
+
+    `seed` ({grupo: último sequencial}, em geral o estado do SQLite local) é
+    importado quando o nó ainda está vazio, para que a troca de backend não
+    volte a emitir códigos já usados.
+    """
+
+    def __init__(self, ref, seed=None):
+        self.ref = ref
+        if seed and not self.load():
+            # Migração única, como a do estado_sequenciais.json no SequenceStore; raise_to nunca diminui
+            # um contador, então duas réplicas importando ao mesmo tempo chegam ao mesmo estado
+            self.raise_to(seed)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def load(self):
+        return {g: int(v) for g, v in _as_dict(self.ref.get()).items()}
+
+    def _transaction(self, update):
+        for attempt in range(TRANSACTION_ATTEMPTS):
+            try:
+                return self.ref.transaction(update)
+            except TransactionAbortedError:
+                if attempt == TRANSACTION_ATTEMPTS - 1: raise
+                time.sleep(random.uniform(0, TRANSACTION_BACKOFF * 2 ** attempt))
+
+    def raise_to(self, values):
+        """Eleva cada contador para pelo menos o valor informado."""
+        values = {str(g): int(v) for g, v in values.items()}
+        if not values: return
+        def update(current):
+            current = _as_dict(current)
+            for g, v in values.items():
+                current[g] = max(int(current.get(g, 0)), v)
+            return current
+        self._transaction(update)
+
+    def reserve(self, group, count, floor=0):
+        """Reserva `count` sequenciais do grupo acima de `floor` e devolve o primeiro."""
+        return self.reserve_many({group: (count, floor)})[group]
+
+    def reserve_many(self, requests):
+        """Reserva numa única transação um bloco por grupo: {grupo: (quantidade, piso)} -> {grupo: primeiro}."""
+        firsts = {}
+        def update(current):
+            # Pode rodar mais de uma vez se outra réplica gravar no meio; vale a última execução
+            current = _as_dict(current)
+            for g, (count, floor) in requests.items():
+                first = max(int(current.get(g, 0)), int(floor)) + 1
+                if first + count - 1 > MAX_SEQ:
+                    raise Exception(f"Limite de 6 dígitos atingido para o grupo {g}.")
+                firsts[g] = first
+                current[g] = first + count - 1
+            return current
+        self._transaction(update)
+        return dict(firsts)
+
+def connect(credentials, database_url, path=RTDB_PATH, seed=None):
+    """RealtimeDatabaseStore sobre o projeto das credenciais (conta de serviço, como em st.secrets)."""
+    import firebase_admin
+    from firebase_admin import credentials as fb_credentials, db
+    try:
+        app = firebase_admin.get_app(FIREBASE_APP_NAME)
+    except ValueError:
+        app = firebase_admin.initialize_app(fb_credentials.Certificate(dict(credentials)), {"databaseURL": database_url},
+                                            name=FIREBASE_APP_NAME)
+    return RealtimeDatabaseStore(db.reference(path, app=app), seed)
+
+def default_database_url(project_id):
+    # URL da instância padrão criada pelo console do Firebase
+    return f"https://{project_id}-default-rtdb.firebaseio.com"
+
+# --- Substituto local para testes e benchmarks ---
+class InMemoryDatabase:
+    """Banco em memória com ETag por versão; `latency` (s) é somada a cada ida ao "servidor"."""
+
+    def __init__(self, data=None, latency=0.0):
+        self.data = copy.deepcopy(data) if data else {}
+        self.latency = latency
+        self.version = 0
+        self.round_trips = 0
+        self.conflicts = 0
+        self.lock = threading.Lock()
+
+    def reference(self, path=""):
+        return InMemoryReference(self, path)
+
+    def _round_trip(self):
+        if self.latency: time.sleep(self.latency)
+
+    def _node(self, parts):
+        node = self.data
+        for p in parts:
+            if not isinstance(node, dict) or p not in node: return None
+            node = node[p]
+        return node
+
+class InMemoryReference:
+    """Imita firebase_admin.db.Reference: get, set, set_if_unchanged, child e transaction."""
+
+    def __init__(self, database, path=""):
+        self.database = database
+        self.parts = [p for p in path.split("/") if p]
+
+    @property
+    def path(self):
+        return "/" + "/".join(self.parts)
+
+    def child(self, path):
+        return InMemoryReference(self.database, "/".join(self.parts + [path]))
+
+    def _etag(self):
+        return str(self.database.version)
+
+    def get(self, etag=False):
+        database = self.database
+        database._round_trip()
+        with database.lock:
+            database.round_trips += 1
+            value = copy.deepcopy(database._node(self.parts))
+            return (value, self._etag()) if etag else value
+
+    def _write(self, value):
+        database = self.database
+        if not self.parts:
+            database.data = copy.deepcopy(value)
+        else:
+            node = database.data
+            for p in self.parts[:-1]:
+                node = node.setdefault(p, {})
+            node[self.parts[-1]] = copy.deepcopy(value)
+        database.version += 1
+
+    def set(self, value):
+        database = self.database
+        database._round_trip()
+        with database.lock:
+            database.round_trips += 1
+            self._write(value)
+
+    def set_if_unchanged(self, expected_etag, value):
+        # Aqui o ETag é do banco inteiro (no Realtime Database é por nó): gera mais conflitos, nunca menos
+        if value is None: raise ValueError("Value must not be none.")
+        database = self.database
+        database._round_trip()
+        with database.lock:
+            database.round_trips += 1
+            if expected_etag != self._etag():
+                database.conflicts += 1
+                return False, copy.deepcopy(database._node(self.parts)), self._etag()
+            self._write(value)
+            return True, copy.deepcopy(value), self._etag()
+
+    def transaction(self, transaction_update):
+        # Mesmo laço do firebase_admin: lê com ETag, aplica a função e tenta gravar até 25 vezes
+        tries = 0
+        data, etag = self.get(etag=True)
+        while tries < TRANSACTION_MAX_RETRIES:
+            new_data = transaction_update(data)
+            success, data, etag = self.set_if_unchanged(etag, new_data)
+            if success:
+                return new_data
+            tries += 1
+        raise TransactionAbortedError("Transaction aborted after failed retries.")
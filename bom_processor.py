@@ -0,0 +1,866 @@
+"""Leitura e codificação de listas de materiais do SolidWorks, sem dependência da interface."""
+import io
+import re
+import codecs
+import json
+import os
+import hashlib
+import importlib.util
+import sqlite3
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# --- CONFIGS ---
+STATE_FILE = "estado_sequenciais.json"
+SEQ_DB_FILE = "estado_sequenciais.db"
+MAX_SEQ = 999_999
+# Máximo de itens listados por categoria (novos, removidos, alterados) no relatório de revisão
+REVISION_REPORT_LIMIT = 20
+
+# Cache em disco das listas já lidas, indexado pelo hash do conteúdo do arquivo
+PARSE_CACHE_DIR = os.path.join(".cache", "bom_parse")
+PARSE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+PARSE_CACHE_VERSION = "2"
+
+# Tempos por etapa, um JSON por linha, para agregar entre usuários
+TIMINGS_LOG_FILE = os.path.join("logs", "etapas.jsonl")
+
+COLUNAS_OBRIGATORIAS = [
+    'Nº DO ITEM', 'Nº DA PEÇA', 'TÍTULO', 'QTD.',
+    'PROCESSO', 'GRUPO DE PRODUTO'
+]
+
+GROUP_PATTERN = re.compile(r'(\d{3})')
+MANU_PATTERN = re.compile(r'^\d{2}-\d{4}-\d{4}-.*')
+COMM_PATTERN = re.compile(r'^\d{3}-(\d+)$')
+SPECIAL_STRUCTURE_PATTERN = re.compile(r'^\d{2}-\d{4}-[A-Za-z0-9]{4}-\d{2}$')
+
+# Tipos de linha na atribuição do CÓDIGO FINAL, na ordem de prioridade da regra
+KIND_SPECIAL, KIND_FABRICADO, KIND_EXISTING, KIND_NEW, KIND_NO_GROUP = range(5)
+
+GROUP_TABLE = { "100":"Mecânico", "200":"Elétrico", "300":"Hidráulico Água", "400":"Hidráulico Óleo", "500":"Pneumático", "600":"Tecnologia", "700":"Infraestrutura", "800":"Insumos", "900":"Segurança", "950":"Serviço" }
+
+# --- Instrumentação ---
+def _read_rss_kb():
+    """(VmRSS, VmHWM) do processo em kB, lidos do /proc (Linux)."""
+    values = {}
+    with open("/proc/self/status", "rb") as f:
+        for line in f:
+            if line.startswith((b"VmRSS", b"VmHWM")): values[line[:5]] = int(line.split()[1])
+    return values[b"VmRSS"], values[b"VmHWM"]
+
+def _reset_rss_peak():
+    # Escrever "5" em clear_refs zera o VmHWM (pico de memória residente) do processo
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+
+def _rss_peak_available():
+    try:
+        _reset_rss_peak()
+        _read_rss_kb()
+        return True
+    except (OSError, KeyError, ValueError):
+        return False
+
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+
+def _start_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing(): tracemalloc.start()
+        _tracing_users += 1
+
+def _stop_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0: tracemalloc.stop()
+
+_memory_mode = None
+
+def _default_memory_mode():
+    # "rss": pico de memória residente pelo /proc, sem custo (Linux);
+    # "tracemalloc": alocações do Python/NumPy, deixa o processamento 3-4x mais lento;
+    # "0": só tempo. Escolhido pela variável BOM_TRACE_MEMORY.
+    # Decidido no primeiro StageTimer, não na importação: o teste do /proc zera o pico de
+    # memória do processo, e quem só importa o módulo (benchmark, workers do lote) não pode perdê-lo
+    global _memory_mode
+    if _memory_mode is None:
+        _memory_mode = os.environ.get("BOM_TRACE_MEMORY") or ("rss" if _rss_peak_available() else "0")
+    return _memory_mode
+
+class StageTimer:
+    """Tempo, linhas/s e pico de memória de cada etapa de um processamento.
+
+    O pico é do processo inteiro: com sessões simultâneas no mesmo servidor,
+    é uma aproximação. `memory="0"` mede só o tempo.
+    """
+
+    def __init__(self, memory=None):
+        self.memory = _default_memory_mode() if memory is None else memory
+        self.run_id = uuid.uuid4().hex[:12]
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        entry = {"etapa": name, "linhas": rows}
+        if self.memory == "rss":
+            _reset_rss_peak()
+            baseline = _read_rss_kb()[0] * 1024
+        elif self.memory == "tracemalloc":
+            _start_tracing()
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        try:
+            yield entry  # a etapa pode ajustar entry["linhas"] quando só conhece o total no fim
+        finally:
+            seconds = time.perf_counter() - started
+            entry["segundos"] = round(seconds, 4)
+            entry["linhas_por_segundo"] = round(entry["linhas"] / seconds) if entry["linhas"] and seconds else None
+            if self.memory == "rss":
+                entry["pico_mb"] = round((_read_rss_kb()[1] * 1024 - baseline) / 1e6, 2)
+            elif self.memory == "tracemalloc":
+                entry["pico_mb"] = round((tracemalloc.get_traced_memory()[1] - baseline) / 1e6, 2)
+                _stop_tracing()
+            self.stages.append(entry)
+
+    def write_log(self, log_file=TIMINGS_LOG_FILE, **context):
+        """Acrescenta uma linha JSON por etapa no log local; falhas de escrita são ignoradas."""
+        base = {"data": datetime.now().isoformat(timespec="seconds"), "execucao": self.run_id, "memoria": self.memory, **context}
+        try:
+            os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+            with open(log_file, "a", encoding="utf-8") as f:
+                for entry in self.stages:
+                    f.write(json.dumps({**base, **entry}, ensure_ascii=False, default=str) + "\n")
+        except OSError:
+            pass
+
+# --- Funções auxiliares ---
+class SequenceStore:
+    """Estado dos sequenciais em SQLite (modo WAL), seguro entre sessões e processos.
+
+    Cada grupo guarda o último sequencial já emitido. `reserve` entrega um
+    bloco de códigos numa transação curta (BEGIN IMMEDIATE), de modo que
+    processamentos simultâneos recebem faixas disjuntas sem que um usuário
+    precise esperar o outro terminar. Os contadores só aumentam.
+
+    É a implementação local da interface de store de sequenciais (load,
+    raise_to, reserve, reserve_many, close); bom_firebase.RealtimeDatabaseStore
+    é a implementação compartilhada entre réplicas.
+    """
+
+    def __init__(self, db_path=SEQ_DB_FILE, legacy_json=STATE_FILE):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS sequenciais (grupo TEXT PRIMARY KEY, ultimo INTEGER NOT NULL)")
+        if legacy_json and os.path.exists(legacy_json) and not self.load():
+            # Migração única do antigo estado_sequenciais.json
+            with open(legacy_json, "r", encoding="utf-8") as f:
+                try: legacy = json.load(f)
+                except json.JSONDecodeError: legacy = {}
+            self.raise_to(legacy)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def load(self):
+        return {g: v for g, v in self.conn.execute("SELECT grupo, ultimo FROM sequenciais ORDER BY rowid")}
+
+    def _transaction(self, fn):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn()
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+        return result
+
+    def raise_to(self, values):
+        """Eleva cada contador para pelo menos o valor informado."""
+        rows = [(str(g), int(v)) for g, v in values.items()]
+        self._transaction(lambda: self.conn.executemany(
+            "INSERT INTO sequenciais (grupo, ultimo) VALUES (?, ?) "
+            "ON CONFLICT(grupo) DO UPDATE SET ultimo = max(ultimo, excluded.ultimo)", rows))
+
+    def reserve(self, group, count, floor=0):
+        """Reserva `count` sequenciais do grupo acima de `floor` e devolve o primeiro."""
+        return self.reserve_many({group: (count, floor)})[group]
+
+    def reserve_many(self, requests):
+        """Reserva numa única transação um bloco por grupo: {grupo: (quantidade, piso)} -> {grupo: primeiro}."""
+        def run():
+            firsts = {}
+            for group, (count, floor) in requests.items():
+                row = self.conn.execute("SELECT ultimo FROM sequenciais WHERE grupo = ?", (group,)).fetchone()
+                first = max(row[0] if row else 0, int(floor)) + 1
+                if first + count - 1 > MAX_SEQ:
+                    raise Exception(f"Limite de 6 dígitos atingido para o grupo {group}.")
+                self.conn.execute(
+                    "INSERT INTO sequenciais (grupo, ultimo) VALUES (?, ?) "
+                    "ON CONFLICT(grupo) DO UPDATE SET ultimo = excluded.ultimo", (group, first + count - 1))
+                firsts[group] = first
+            return firsts
+        return self._transaction(run)
+
+def load_sequentials(db_path=SEQ_DB_FILE):
+    with SequenceStore(db_path) as store:
+        return store.load()
+
+def save_sequentials(data, db_path=SEQ_DB_FILE):
+    # Nunca diminui um contador: outra sessão pode já ter reservado códigos acima
+    with SequenceStore(db_path) as store:
+        store.raise_to(data)
+
+ITEM_KEY = ['peca', 'titulo', 'grupo', 'ocorrencia']
+
+class AssemblyRevisions:
+    """Itens e códigos da última revisão de cada conjunto principal, no mesmo banco dos sequenciais.
+
+    Cada conjunto guarda o número da revisão e uma tabela (Feather, numa coluna
+    BLOB) com um item por (Nº DA PEÇA, TÍTULO, GRUPO, ocorrência): o código
+    que recebeu, a quantidade e se está na última revisão (`ativo`). Itens
+    que saem da lista continuam guardados, então voltam com o mesmo código.
+    """
+
+    def __init__(self, db_path=SEQ_DB_FILE):
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS conjuntos (conjunto TEXT PRIMARY KEY, revisao INTEGER NOT NULL, itens BLOB NOT NULL)")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def load(self, assembly):
+        """Última revisão do conjunto e o DataFrame de todos os itens já vistos (vazio na primeira)."""
+        row = self.conn.execute("SELECT revisao, itens FROM conjuntos WHERE conjunto = ?", (assembly,)).fetchone()
+        if row is None:
+            empty = pd.Series([], dtype=object)
+            return 0, pd.DataFrame({'peca': empty, 'titulo': empty, 'grupo': empty, 'ocorrencia': pd.Series([], dtype='int64'),
+                                    'qtd': pd.Series([], dtype=float), 'codigo': empty, 'ativo': pd.Series([], dtype=bool)})
+        return row[0], feather.read_table(pa.BufferReader(row[1])).to_pandas()
+
+    def save(self, assembly, revision, items):
+        out = pa.BufferOutputStream()
+        feather.write_feather(pa.Table.from_pandas(items, preserve_index=False), out)
+        self.conn.execute(
+            "INSERT INTO conjuntos (conjunto, revisao, itens) VALUES (?, ?, ?) "
+            "ON CONFLICT(conjunto) DO UPDATE SET revisao = excluded.revisao, itens = excluded.itens",
+            (assembly, revision, out.getvalue().to_pybytes()))
+
+TXT_SAMPLE_SIZE = 64 * 1024
+
+def _detect_txt_encoding(content_bytes, header_start):
+    # Amostra do início do arquivo + rodapé; o decodificador incremental tolera um caractere cortado no fim da amostra
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(content_bytes[:TXT_SAMPLE_SIZE], final=False)
+        content_bytes[header_start:].decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+def _find_header_line(content_bytes, sep):
+    # Última linha não vazia do arquivo, procurada de trás para frente sem decodificar o resto
+    end = len(content_bytes)
+    while end > 0:
+        start = content_bytes.rfind(sep, 0, end) + 1
+        if content_bytes[start:end].decode('latin-1').strip():
+            return start, end
+        end = start - 1
+    return None
+
+def _reversed_data_lines(content_bytes, data_end, sep):
+    # Reescreve as linhas de dados em ordem inversa num único buffer, descartando linhas em branco
+    data = np.frombuffer(content_bytes, dtype=np.uint8, count=data_end)
+    breaks = np.flatnonzero(data == ord(sep))
+    starts = np.concatenate(([0], breaks + 1))
+    ends = np.concatenate((breaks, [data_end]))
+    out = bytearray()
+    for start, end in zip(starts[::-1].tolist(), ends[::-1].tolist()):
+        line = content_bytes[start:end]
+        if line.strip():
+            out += line
+            out += b'\n'
+    return out
+
+def read_solidworks_txt(content_bytes, report_log, timer=None):
+    """Lê a exportação TXT do SolidWorks (cabeçalho na última linha, itens de baixo para cima).
+
+    O cabeçalho e a codificação são obtidos do rodapé e de uma amostra, e as
+    linhas de dados vão direto dos bytes para o parser C já na ordem final,
+    sem decodificar o arquivo inteiro em texto. Retorna None se não houver
+    nenhuma linha com conteúdo.
+    """
+    timer = timer or StageTimer(memory="0")
+    with timer.stage("decodificação") as stage:
+        sep = b'\n' if b'\n' in content_bytes else b'\r'
+        header_pos = _find_header_line(content_bytes, sep)
+        if header_pos is None: return None
+        header_start, header_end = header_pos
+
+        encoding = _detect_txt_encoding(content_bytes, header_start)
+        data = _reversed_data_lines(content_bytes, max(header_start - 1, 0), sep)
+        stage["linhas"] = data.count(b'\n')
+
+    def parse(enc):
+        header = [h.strip() for h in content_bytes[header_start:header_end].decode(enc).split('\t')]
+        if not data: return pd.DataFrame({h: pd.Series(dtype=str) for h in header})
+        # Campos além do cabeçalho (tabulação no fim da linha) são descartados: sem index_col=False o
+        # parser C usaria a primeira coluna como índice, e sem usecols recusaria linhas de tamanhos diferentes
+        return pd.read_csv(io.BytesIO(data), sep='\t', header=None, names=header, dtype=str, encoding=enc, engine='c',
+                           index_col=False, usecols=range(len(header)))
+
+    with timer.stage("leitura", stage["linhas"]):
+        if encoding == 'utf-8':
+            try:
+                return parse('utf-8')
+            except UnicodeDecodeError:
+                pass
+        report_log.append("ℹ️ Arquivo não é UTF-8, tentando decodificar como Latin-1.")
+        return parse('latin-1')
+
+# --- Cache de leitura ---
+def parse_cache_key(content_bytes, name, sheet_name=0):
+    h = hashlib.sha256(f"{PARSE_CACHE_VERSION}|{os.path.splitext(name.lower())[1]}|{sheet_name!r}|".encode())
+    h.update(content_bytes)
+    return h.hexdigest()
+
+def read_parse_cache(key, cache_dir=PARSE_CACHE_DIR):
+    path = os.path.join(cache_dir, f"{key}.feather")
+    try:
+        table = feather.read_table(path, memory_map=True)
+        meta = json.loads(table.schema.metadata[b"bom_report"])
+        os.utime(path)  # marca a entrada como usada recentemente (LRU)
+    except (OSError, KeyError, TypeError, ValueError, pa.ArrowException):
+        return None
+    return table.to_pandas(), meta["report_log"], meta["message"]
+
+def write_parse_cache(key, df, report_log, message, cache_dir=PARSE_CACHE_DIR, max_bytes=PARSE_CACHE_MAX_BYTES):
+    path = os.path.join(cache_dir, f"{key}.feather")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        meta = dict(table.schema.metadata or {})
+        meta[b"bom_report"] = json.dumps({"report_log": report_log, "message": message}, ensure_ascii=False).encode()
+        feather.write_feather(table.replace_schema_metadata(meta), tmp_path)
+        os.replace(tmp_path, path)  # outras sessões nunca veem um arquivo pela metade
+    except (OSError, pa.ArrowException):
+        if os.path.exists(tmp_path): os.remove(tmp_path)
+        return
+    evict_parse_cache(cache_dir, max_bytes)
+
+def evict_parse_cache(cache_dir=PARSE_CACHE_DIR, max_bytes=PARSE_CACHE_MAX_BYTES):
+    # Mantém as entradas usadas mais recentemente até o limite de tamanho e remove o resto
+    try:
+        entries = [(e.stat().st_mtime, e.stat().st_size, e.path) for e in os.scandir(cache_dir) if e.name.endswith(".feather")]
+    except OSError:
+        return
+    total = 0
+    for _, size, path in sorted(entries, reverse=True):
+        total += size
+        if total > max_bytes:
+            try: os.remove(path)
+            except OSError: pass
+
+# --- Leitura de XLSX ---
+def xlsx_engine():
+    # python-calamine é opcional; quando instalado, lê o xlsx bem mais rápido que o openpyxl
+    return "calamine" if importlib.util.find_spec("python_calamine") else "openpyxl"
+
+def list_sheets(content_bytes):
+    # Só o índice do workbook é lido (openpyxl em modo read-only), nenhuma planilha é carregada
+    with pd.ExcelFile(io.BytesIO(content_bytes), engine=xlsx_engine()) as xl:
+        return xl.sheet_names
+
+def read_xlsx(content_bytes, sheet_name=0, usecols=None):
+    """Lê uma aba do xlsx percorrendo as linhas em modo somente leitura.
+
+    `usecols` segue o pd.read_excel (lista de nomes ou função) e permite
+    descartar colunas sem materializá-las.
+    """
+    with pd.ExcelFile(io.BytesIO(content_bytes), engine=xlsx_engine()) as xl:
+        return xl.parse(sheet_name, usecols=usecols)
+
+def load_data(uploaded_file, sheet_name=0, timer=None):
+    if uploaded_file is None: return None, [], "Nenhum arquivo carregado."
+    return load_bytes(uploaded_file.getvalue(), uploaded_file.name, sheet_name, timer)
+
+def load_path(path, sheet_name=0, timer=None):
+    with open(path, "rb") as f:
+        return load_bytes(f.read(), os.path.basename(path), sheet_name, timer)
+
+def load_bytes(content_bytes, file_name, sheet_name=0, timer=None):
+    timer = timer or StageTimer(memory="0")
+    with timer.stage("cache de leitura") as stage:
+        key = parse_cache_key(content_bytes, file_name, sheet_name)
+        cached = read_parse_cache(key)
+        if cached is not None: stage["linhas"] = len(cached[0])
+    if cached is not None:
+        return cached
+    df, report_log, message = parse_upload(content_bytes, file_name, sheet_name, timer)
+    if df is not None:
+        write_parse_cache(key, df, report_log, message)
+    return df, report_log, message
+
+def parse_upload(content_bytes, file_name, sheet_name=0, timer=None):
+    timer = timer or StageTimer(memory="0")
+    report_log, df = [], None
+    try:
+        name = file_name.lower()
+        if name.endswith(".xlsx"): 
+            with timer.stage("leitura") as stage:
+                df = read_xlsx(content_bytes, sheet_name)
+                stage["linhas"] = len(df)
+        elif name.endswith(".txt"):
+            df = read_solidworks_txt(content_bytes, report_log, timer)
+            if df is None:
+                return None, [], "Arquivo TXT está vazio ou contém apenas linhas em branco."
+        else: 
+            return None, [], "Formato de arquivo não suportado."
+
+        with timer.stage("normalização de colunas", len(df)):
+            missing_cols = set(COLUNAS_OBRIGATORIAS) - set(df.columns)
+            if missing_cols:
+                report_log.append(f"⚠️ Colunas obrigatórias ausentes (criadas vazias): **{', '.join(sorted(list(missing_cols)))}**")
+                for col in sorted(list(missing_cols)): 
+                    df[col] = ''
+            
+            final_order = COLUNAS_OBRIGATORIAS + sorted(list(set(df.columns) - set(COLUNAS_OBRIGATORIAS)))
+            df = df[final_order].copy()
+            df['QTD.'] = pd.to_numeric(df['QTD.'], errors='coerce').fillna(0)
+            df.fillna('', inplace=True)
+        return df, report_log, "Arquivo lido com sucesso."
+        
+    except Exception as e: 
+        return None, [f"❌ Erro ao ler o arquivo: {e}"], f"Erro ao ler o arquivo: {e}"
+
+# --- Hierarquia dos itens ---
+class ItemHierarchy:
+    """Árvore dos 'Nº DO ITEM' (1, 1.1, 1.1.2...) com o pai de cada linha.
+
+    O pai de uma linha é o ancestral mais próximo que existe na lista; níveis
+    ausentes são pulados e, com itens repetidos, vale a última ocorrência.
+    Cada prefixo é resolvido uma única vez, então a construção é linear no
+    número de linhas. `parent` guarda a posição da linha pai (-1 na raiz).
+    """
+
+    def __init__(self, item_ids):
+        self.item_ids = np.asarray(item_ids, dtype=object)
+        position = {item: i for i, item in enumerate(self.item_ids)}
+        nearest = {}
+
+        def resolve(prefix):
+            chain = []
+            while True:
+                if prefix in position: found = position[prefix]; break
+                if prefix in nearest: found = nearest[prefix]; break
+                chain.append(prefix)
+                if '.' not in prefix: found = -1; break
+                prefix = prefix.rsplit('.', 1)[0]
+            for p in chain: nearest[p] = found
+            return found
+
+        self.parent = np.fromiter(
+            (resolve(item.rsplit('.', 1)[0]) if '.' in item else -1 for item in self.item_ids),
+            dtype=np.int64, count=len(self.item_ids),
+        )
+        # Pais têm 'Nº DO ITEM' mais curto, então a ordem por tamanho visita o pai antes do filho
+        self.depth = np.zeros(len(self.parent), dtype=np.int64)
+        for i in sorted(range(len(self.parent)), key=lambda i: len(self.item_ids[i])):
+            if self.parent[i] >= 0: self.depth[i] = self.depth[self.parent[i]] + 1
+
+    def parent_codes(self, codes):
+        """Código do pai de cada linha ('' para itens de nível superior)."""
+        codes = np.asarray(codes, dtype=object)
+        out = np.full(len(codes), '', dtype=object)
+        has_parent = self.parent >= 0
+        out[has_parent] = codes[self.parent[has_parent]]
+        return out
+
+    def _levels(self, reverse=False):
+        levels = range(int(self.depth.max(initial=0)), 0, -1) if reverse else range(1, int(self.depth.max(initial=0)) + 1)
+        for d in levels:
+            rows = np.flatnonzero(self.depth == d)
+            yield rows, self.parent[rows]
+
+    def rollup(self, values):
+        """Soma de `values` em cada subconjunto (a própria linha mais todos os descendentes)."""
+        totals = np.array(values, dtype=float)
+        for rows, parents in self._levels(reverse=True):
+            np.add.at(totals, parents, totals[rows])
+        return totals
+
+    def path_product(self, values):
+        """Produto de `values` da raiz até cada linha, ex.: quantidade total de um item no conjunto."""
+        totals = np.array(values, dtype=float)
+        for rows, parents in self._levels():
+            totals[rows] *= totals[parents]
+        return totals
+
+# ==============================================================================
+# ======================== FUNÇÃO PROCESS_CODES ATUALIZADA =====================
+# ==============================================================================
+def _column_values(df, col, default=''):
+    if col in df.columns: return df[col].to_numpy(dtype=object)
+    return np.full(len(df), default, dtype=object)
+
+def _match_mask(values, pattern):
+    return np.fromiter((pattern.match(v) is not None for v in values), dtype=bool, count=len(values))
+
+def _is_commercial_code(value):
+    # Código comercial completo (GGG-NNNNNN), o mesmo critério de KIND_EXISTING
+    return isinstance(value, str) and (m := COMM_PATTERN.match(value)) is not None and len(m.group(1)) == 6
+
+def _text_columns(df):
+    return [c for c, dtype in df.dtypes.items() if dtype == object or isinstance(dtype, pd.StringDtype)]
+
+def upper_text(values, compact=False):
+    """Coluna de texto em maiúsculas.
+
+    No modo compacto, colunas com muitos valores repetidos (PROCESSO, GRUPO DE
+    PRODUTO, CÓDIGO PAI...) viram categóricas e só os valores distintos são
+    convertidos; as demais ficam como texto em Arrow (string[pyarrow]).
+    """
+    if not compact: return values.astype(str).str.upper()
+    codes, uniques = pd.factorize(values)
+    if len(uniques) <= len(values) // 2:
+        # Valores distintos podem coincidir depois das maiúsculas ("m6" e "M6")
+        upper_codes, categories = pd.factorize(pd.Index(uniques).astype(str).str.upper())
+        codes = np.append(upper_codes, -1)[codes]  # -1 (vazio) continua -1
+        return pd.Series(pd.Categorical.from_codes(codes, categories), index=values.index, name=values.name)
+    values = values.astype(str).str.upper()
+    if getattr(values.dtype, "storage", None) == "pyarrow": return values
+    return values.astype("string[pyarrow]")
+
+def item_frame(num_peca, titles, groups, qtds):
+    """Itens da lista no formato do AssemblyRevisions, com a ocorrência de cada um.
+
+    A ocorrência numera as repetições do mesmo item na lista, já que cada
+    linha comercial recebe um código próprio.
+    """
+    items = pd.DataFrame({
+        'peca': pd.Series(num_peca, dtype=object).astype(str).str.strip().str.upper(),
+        'titulo': pd.Series(titles, dtype=object).astype(str).str.strip().str.upper(),
+        'grupo': pd.Series(groups, dtype=object).astype(str),
+    })
+    items['ocorrencia'] = items.groupby(ITEM_KEY[:3], sort=False, dropna=False).cumcount()
+    items['qtd'] = pd.to_numeric(pd.Series(qtds), errors='coerce').astype(float).to_numpy()
+    return items
+
+def _item_ids(items):
+    # Chave única em uma coluna de texto: comparar uma coluna é bem mais rápido que um merge em quatro.
+    # Índice de objetos: o isin das strings em Arrow do pandas 3 percorre os valores em Python
+    peca, titulo, grupo, ocorrencia = (items[c].astype(str) for c in ITEM_KEY)
+    return pd.Index((peca + '\x1f' + titulo + '\x1f' + grupo + '\x1f' + ocorrencia).to_numpy(dtype=object), dtype=object)
+
+def _describe_items(label, items, extra=None):
+    lines = [f"{label} {peca} \"{titulo}\"" for peca, titulo in zip(items['peca'][:REVISION_REPORT_LIMIT], items['titulo'][:REVISION_REPORT_LIMIT])]
+    if extra is not None: lines = [f"{line} {e}" for line, e in zip(lines, extra)]
+    if len(items) > REVISION_REPORT_LIMIT: lines.append(f"{label} ... e mais {len(items) - REVISION_REPORT_LIMIT} itens.")
+    return lines
+
+def revision_report(assembly, last_revision, items, known, item_ids, known_ids):
+    """Itens novos, removidos e alterados em relação à última revisão do conjunto."""
+    if not last_revision: return [f"ℹ️ Primeira revisão registrada para o conjunto {assembly}."]
+    active = known['ativo'].to_numpy(dtype=bool)
+    previous, previous_ids = known[active], known_ids[active]
+    added = items[~item_ids.isin(previous_ids)]
+    removed = previous[~previous_ids.isin(item_ids)]
+    previous_qtd = pd.Series(previous['qtd'].to_numpy(), index=previous_ids).reindex(item_ids).to_numpy()
+    qty_changed = items.assign(qtd_anterior=previous_qtd)
+    qty_changed = qty_changed[qty_changed['qtd'].notna() & qty_changed['qtd_anterior'].notna() & (qty_changed['qtd'] != qty_changed['qtd_anterior'])]
+    # Mesmo item (peça, título, ocorrência) em outro grupo conta como alteração, não como novo + removido
+    same_item = ['peca', 'titulo', 'ocorrencia']
+    regrouped = added.merge(removed[same_item + ['grupo']].drop_duplicates(same_item), on=same_item, suffixes=('', '_anterior'))
+    if len(regrouped):
+        added = added[~_item_ids(added.assign(grupo='')).isin(_item_ids(regrouped.assign(grupo='')))]
+        removed = removed[~_item_ids(removed).isin(_item_ids(regrouped.assign(grupo=regrouped['grupo_anterior'])))]
+
+    report = [f"ℹ️ Revisão {last_revision + 1} do conjunto {assembly}: {len(added)} itens novos, {len(removed)} removidos, "
+              f"{len(regrouped) + len(qty_changed)} alterados."]
+    report += _describe_items("➕ Novo:", added)
+    report += _describe_items("➖ Removido:", removed)
+    report += _describe_items("✏️ Alterado:", regrouped, [f"grupo {old or '-'} -> {new or '-'}" for old, new in zip(regrouped['grupo_anterior'], regrouped['grupo'])])
+    report += _describe_items("✏️ Alterado:", qty_changed, [f"qtd. {old:g} -> {new:g}" for old, new in zip(qty_changed['qtd_anterior'], qty_changed['qtd'])])
+    return report
+
+def revision_snapshot(items, codes, known, item_ids, known_ids):
+    """Tabela a gravar: os itens desta revisão e os que saíram da lista (inativos, com o código guardado)."""
+    current = items.assign(codigo=pd.Series(codes, dtype=object).astype(str).to_numpy(), ativo=True)
+    gone = known[~known_ids.isin(item_ids)].assign(ativo=False)
+    return pd.concat([current, gone], ignore_index=True) if len(gone) else current
+
+def classify_rows(df):
+    """Classifica todas as linhas de uma vez.
+
+    Retorna o tipo de cada linha (KIND_*), o 'Nº DA PEÇA' como texto, os
+    matches de COMM_PATTERN sobre ele e o grupo de 3 dígitos extraído do
+    'GRUPO DE PRODUTO'.
+    """
+    num_peca = np.array([str(v) for v in _column_values(df, 'Nº DA PEÇA')], dtype=object)
+    group_matches = [GROUP_PATTERN.search(str(v)) for v in _column_values(df, 'GRUPO DE PRODUTO')]
+    comm_matches = [COMM_PATTERN.match(v) for v in num_peca]
+
+    special = _match_mask(num_peca, SPECIAL_STRUCTURE_PATTERN)
+    fabricado = (df['PROCESSO'] == 'FABRICADO').to_numpy(dtype=bool)
+    existing = np.fromiter((m is not None and len(m.group(1)) == 6 for m in comm_matches), dtype=bool, count=len(df))
+    has_group = np.fromiter((m is not None for m in group_matches), dtype=bool, count=len(df))
+
+    kind = np.select(
+        [special, fabricado, existing, has_group],
+        [KIND_SPECIAL, KIND_FABRICADO, KIND_EXISTING, KIND_NEW],
+        default=KIND_NO_GROUP,
+    )
+    groups = np.array([m.group(1) if m else '' for m in group_matches], dtype=object)
+    return kind, num_peca, comm_matches, groups
+
+class AllocatedCodeIndex:
+    """Contadores por grupo dos sequenciais já ocupados, usados para emitir os novos.
+
+    `counters` é o dicionário grupo -> último sequencial emitido (estado
+    persistido já mesclado com os valores da tela) e é atualizado no lugar.
+    `seed` eleva cada contador acima dos códigos GGG-N que já aparecem na
+    lista; como todo bloco novo começa depois do contador, um novo código
+    nunca repete um existente, em nenhum grupo. Com um `store`, cada bloco é
+    reservado no SequenceStore e não colide com outras sessões.
+    """
+
+    def __init__(self, counters, store=None):
+        self.counters = counters
+        self.store = store
+
+    def seed(self, num_peca, comm_matches):
+        # Códigos comerciais já presentes (GGG-N) elevam o contador do grupo ao maior sequencial usado
+        hits = [(v[:3], int(m.group(1))) for v, m in zip(num_peca, comm_matches) if m]
+        if not hits: return
+        keys, seqs = zip(*hits)
+        for g, top in pd.Series(seqs, dtype=object).groupby(np.array(keys, dtype=object), sort=False).max().items():
+            self.counters[g] = max(self.counters.get(g, 0), int(top))
+
+    def reserve_all(self, counts):
+        """Reserva {grupo: quantidade} com uma única ida ao store."""
+        requests = {g: (int(n), self.counters.get(g, 0)) for g, n in counts.items() if n}
+        firsts = self.store.reserve_many(requests) if self.store is not None else {g: floor + 1 for g, (_, floor) in requests.items()}
+        return {g: self.reserve(g, n, firsts.get(g)) for g, n in counts.items()}
+
+    def reserve(self, group, count, first=None):
+        """Reserva os próximos `count` sequenciais do grupo, em ordem crescente.
+
+        `first` é o início de um bloco de `count` já reservado no store.
+        """
+        if not count: return np.array([], dtype=object)
+        last = self.counters.get(group, 0)
+        if first is None: first = self.store.reserve(group, count, floor=last) if self.store is not None else last + 1
+        self.counters[group] = int(first + count - 1)
+        return np.arange(first, first + count, dtype=object)
+
+    def allocate(self, groups):
+        """Gera os novos códigos para as linhas (em ordem) que precisam de um.
+
+        Cada linha recebe o sequencial livre de índice igual à sua posição
+        dentro do grupo (contagem cumulativa agrupada).
+        """
+        if len(groups) == 0: return np.array([], dtype=object)
+        groups = pd.Series(groups, dtype=object)
+        rank = groups.groupby(groups, sort=False).cumcount().to_numpy()
+        # Verificado antes de reservar, na ordem das linhas: com vários grupos estourando, o erro
+        # cita o grupo da primeira linha que passaria do limite, como na regra original
+        over = np.flatnonzero(np.array([self.counters.get(g, 0) for g in groups], dtype=object) + rank + 1 > MAX_SEQ)
+        if over.size:
+            raise Exception(f"Limite de 6 dígitos atingido para o grupo {groups.iat[over[0]]}.")
+        blocks = self.reserve_all(groups.value_counts(sort=False).to_dict())
+        seq = np.array([blocks[g][r] for g, r in zip(groups, rank)], dtype=object)
+        return np.array([f"{g}-{s:06d}" for g, s in zip(groups, seq)], dtype=object)
+
+def process_codes(df, sequentials, json_state, column_report, main_assembly_code, store=None, timer=None, compact=False,
+                  revisions=None, assembly_key=None):
+    """Gera os códigos da lista.
+
+    Com `compact=True`, as colunas de texto repetitivo saem categóricas (ver
+    upper_text). Com um AssemblyRevisions em `revisions`, a lista é tratada
+    como nova revisão do conjunto `assembly_key` (padrão: o código do conjunto
+    principal): comerciais já codificados reaproveitam o código e o relatório
+    lista o que mudou.
+    """
+    if df is None or df.empty: return pd.DataFrame(), [], "DataFrame vazio."
+    own_store = store is None
+    if own_store: store = SequenceStore()
+    if revisions is not None:
+        assembly_key = str(assembly_key or main_assembly_code or '').strip().upper()
+        if not assembly_key: revisions = None
+    try:
+        return _process_codes(df, sequentials, json_state, column_report, main_assembly_code, store,
+                              timer or StageTimer(memory="0"), compact, revisions, assembly_key)
+    finally:
+        if own_store: store.close()
+
+def _process_codes(df, sequentials, json_state, column_report, main_assembly_code, store, timer, compact, revisions, assembly_key):
+    report_log = list(column_report)
+    n = len(df)
+    
+    for g in sequentials.keys(): 
+        sequentials[g] = max(int(sequentials[g]), int(json_state.get(g, 0)))
+
+    with timer.stage("preenchimento PROCESSO", n):
+        df['PROCESSO'] = df['PROCESSO'].astype(str).str.strip().str.upper()
+        empty_process = (df['PROCESSO'].isin(['', 'NAN', None]) | pd.isna(df['PROCESSO'])).to_numpy()
+        count_filled = int(empty_process.sum())
+        if count_filled > 0:
+            num_empty = [str(v) for v in df.loc[empty_process, 'Nº DA PEÇA']]
+            df.loc[empty_process, 'PROCESSO'] = np.where(_match_mask(num_empty, MANU_PATTERN), 'FABRICADO', 'COMERCIAL')
+            report_log.append(f"✔️ Coluna 'PROCESSO' preenchida para {count_filled} itens.")
+
+    with timer.stage("classificação", n):
+        kind, num_peca, comm_matches, groups = classify_rows(df)
+        allocated = AllocatedCodeIndex(sequentials, store)
+        allocated.seed(num_peca, comm_matches)
+
+        codes = np.full(len(df), 'NULO', dtype=object)
+        for k in (KIND_SPECIAL, KIND_EXISTING):
+            codes[kind == k] = num_peca[kind == k]
+        # FABRICADO mantém o valor original da célula, sem conversão para texto
+        fab = kind == KIND_FABRICADO
+        codes[fab] = _column_values(df, 'Nº DA PEÇA')[fab]
+        is_new = kind == KIND_NEW
+
+    if revisions is not None:
+        with timer.stage("revisão anterior", n):
+            items = item_frame(num_peca, _column_values(df, 'TÍTULO'), groups, df['QTD.'].to_numpy())
+            last_revision, known = revisions.load(assembly_key)
+            item_ids, known_ids = _item_ids(items), _item_ids(known)
+            # Reaproveita o código de um comercial já visto neste conjunto, se ainda for do mesmo grupo.
+            # Só vale um código GGG-NNNNNN: um item que era FABRICADO guardou o próprio Nº DA PEÇA
+            new_idx = np.flatnonzero(is_new)
+            previous_codes = pd.Series(known['codigo'].to_numpy(dtype=object), index=known_ids).reindex(item_ids[new_idx]).to_numpy(dtype=object)
+            reuse = np.fromiter((_is_commercial_code(c) and c[:3] == g for c, g in zip(previous_codes, groups[new_idx])),
+                                dtype=bool, count=len(new_idx))
+            # Nunca repete um código da lista: o que já está em outra linha (ex.: digitado no Nº DA PEÇA)
+            # ou o de outro item reaproveitado fica com o primeiro; os demais recebem código novo
+            reuse &= ~pd.Series(previous_codes, dtype=object).isin(pd.Index(codes[~is_new], dtype=object)).to_numpy()
+            reuse[reuse] = ~pd.Series(previous_codes[reuse], dtype=object).duplicated().to_numpy()
+            codes[new_idx[reuse]] = previous_codes[reuse]
+            is_new[new_idx[reuse]] = False
+            # Os códigos novos desta lista começam acima dos reaproveitados
+            allocated.seed(previous_codes[reuse], [COMM_PATTERN.match(c) for c in previous_codes[reuse]])
+            reused_count = int(reuse.sum())
+            revision_log = revision_report(assembly_key, last_revision, items, known, item_ids, known_ids)
+
+    with timer.stage("geração de códigos", int(is_new.sum())):
+        codes[is_new] = allocated.allocate(groups[is_new])
+        generated_codes_count = int(is_new.sum())
+        df['CÓDIGO FINAL'] = codes
+
+    for title in _column_values(df, 'TÍTULO')[kind == KIND_NO_GROUP]:
+        report_log.append(f"⚠️ \"{title}\" COMERCIAL sem grupo -> NULO")
+
+    # --- LÓGICA DO CÓDIGO PAI ATUALIZADA ---
+    with timer.stage("código pai", n):
+        df['Nº DO ITEM'] = df['Nº DO ITEM'].astype(str).str.strip()
+        hierarchy = ItemHierarchy(df['Nº DO ITEM'].to_numpy(dtype=object))
+        df['CÓDIGO PAI'] = hierarchy.parent_codes(df['CÓDIGO FINAL'].to_numpy(dtype=object))
+        
+        # NOVO: Aplica o código do conjunto principal aos itens de nível superior
+        if main_assembly_code:
+            main_code_upper = str(main_assembly_code).strip().upper()
+            # Aplica somente onde o 'CÓDIGO PAI' está em branco
+            df.loc[df['CÓDIGO PAI'] == '', 'CÓDIGO PAI'] = main_code_upper
+    
+    # Chave de ordenação (TIPO, CÓDIGO FINAL) montada antes das maiúsculas, sobre os valores originais
+    with timer.stage("chave de ordenação", n):
+        tipo = np.select(
+            [(df['PROCESSO'] == 'FABRICADO').to_numpy(dtype=bool), (df['CÓDIGO FINAL'] != 'NULO').to_numpy(dtype=bool)],
+            [1, 2],
+            default=3,
+        )
+        sort_keys = pd.DataFrame({'TIPO': tipo, 'CÓDIGO FINAL': df['CÓDIGO FINAL'].array})
+
+    with timer.stage("maiúsculas", n):
+        for col in _text_columns(df):
+            df[col] = upper_text(df[col], compact)
+
+    with timer.stage("ordenação", n):
+        order = sort_keys.sort_values(by=['TIPO', 'CÓDIGO FINAL']).index.to_numpy()
+        df = df.take(order).reset_index(drop=True)
+
+    with timer.stage("gravação do estado"):
+        store.raise_to(sequentials)
+        if revisions is not None:
+            revisions.save(assembly_key, last_revision + 1, revision_snapshot(items, codes, known, item_ids, known_ids))
+
+    if revisions is not None:
+        report_log[0:0] = revision_log
+        if reused_count: report_log.insert(0, f"✔️ {reused_count} códigos comerciais reaproveitados da revisão anterior.")
+    report_log.insert(0, f"✅ Processamento concluído. {generated_codes_count} novos códigos comerciais foram gerados.")
+    return df, report_log
+
+# --- Exportação ---
+EXPORT_CACHE_MAX_ENTRIES = 8
+_export_cache = OrderedDict()
+_export_lock = threading.Lock()
+
+def to_excel(table):
+    # constant_memory grava linha a linha em disco temporário; o workbook nunca fica inteiro na memória
+    out = io.BytesIO()
+    wb = xlsxwriter.Workbook(out, {'constant_memory': True, 'default_date_format': 'yyyy-mm-dd hh:mm:ss'})
+    ws = wb.add_worksheet('Lista de Peças')
+    header_fmt = wb.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+    ws.write_row(0, 0, table.column_names, header_fmt)
+    row = 1
+    for batch in table.to_batches():
+        for values in zip(*(col.to_pylist() for col in batch.columns)):
+            ws.write_row(row, 0, [None if v != v else v for v in values])  # v != v: NaN
+            row += 1
+    wb.close()
+    return out.getvalue()
+
+def to_csv(table):
+    return table.to_pandas().to_csv(index=False).encode("utf-8")
+
+EXPORTERS = {"xlsx": to_excel, "csv": to_csv}
+
+def build_export(result_id, table, fmt):
+    """Gera (ou reaproveita) o arquivo de exportação para (resultado, colunas, formato)."""
+    key = (result_id, tuple(table.column_names), fmt)
+    with _export_lock:
+        if key in _export_cache:
+            _export_cache.move_to_end(key)
+            return _export_cache[key]
+    timer = StageTimer()
+    with timer.stage(f"exportação {fmt}", table.num_rows):
+        data = EXPORTERS[fmt](table)
+    timer.write_log(resultado=result_id)
+    with _export_lock:
+        _export_cache[key] = data
+        while len(_export_cache) > EXPORT_CACHE_MAX_ENTRIES: _export_cache.popitem(last=False)
+    return data
+
+def lazy_export(result_id, table, fmt):
+    # O download_button só chama a função quando o usuário clica
+    return lambda: build_export(result_id, table, fmt)
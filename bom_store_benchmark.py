@@ -0,0 +1,106 @@
+"""Benchmark das reservas de sequenciais por backend e tamanho de bloco.
+
+Várias threads (réplicas do app ou workers do lote) reservam o mesmo total
+de códigos em blocos de tamanho fixo, todas no mesmo grupo, o pior caso de
+disputa. Para cada backend e tamanho de bloco saem códigos/s, latência p50/p95
+de cada reserva e, no Realtime Database em memória, idas ao servidor e
+conflitos de ETag. Os backends são o SQLite local e o substituto em memória
+do Realtime Database (bom_firebase.InMemoryDatabase) com latência simulada,
+então nada passa pela rede.
+
+Uso:
+    python bom_store_benchmark.py [--blocos 1 10 100 1000] [--codigos 10000] [--workers 4] [--latencia-ms 20] [--saida bench.jsonl]
+"""
+import argparse
+import json
+import os
+import platform
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from bom_benchmark import _git_revision
+from bom_firebase import RTDB_PATH, InMemoryDatabase, RealtimeDatabaseStore
+from bom_processor import SequenceStore
+
+DEFAULT_BLOCKS = [1, 10, 100, 1000]
+BACKENDS = ("sqlite", "memoria")
+GROUP = "100"
+
+def _run(open_store, block, total, workers):
+    """Reserva `total` códigos em blocos de `block` com `workers` threads; devolve (segundos, latências, primeiros)."""
+    per_worker = max(total // (block * workers), 1)
+    latencies, firsts, lock = [], [], threading.Lock()
+
+    def worker():
+        own_latencies, own_firsts = [], []
+        with open_store() as store:
+            for _ in range(per_worker):
+                started = time.perf_counter()
+                own_firsts.append(store.reserve(GROUP, block))
+                own_latencies.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(own_latencies)
+            firsts.extend(own_firsts)
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    started = time.perf_counter()
+    for t in threads: t.start()
+    for t in threads: t.join()
+    return time.perf_counter() - started, latencies, firsts
+
+def run_benchmarks(block_sizes=DEFAULT_BLOCKS, total=10_000, workers=4, latency_ms=20.0, backends=BACKENDS):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in backends:
+            for block in block_sizes:
+                extra = {}
+                if backend == "sqlite":
+                    db_path = os.path.join(tmp, f"bench_{block}.db")
+                    # Cada thread abre a própria conexão, como as sessões do app e os workers do lote
+                    seconds, latencies, firsts = _run(lambda: SequenceStore(db_path, legacy_json=None), block, total, workers)
+                else:
+                    database = InMemoryDatabase(latency=latency_ms / 1000)
+                    store = RealtimeDatabaseStore(database.reference(RTDB_PATH))
+                    seconds, latencies, firsts = _run(lambda: store, block, total, workers)
+                    extra = {"idas_ao_servidor": database.round_trips, "conflitos": database.conflicts}
+                # Blocos sobrepostos indicariam códigos repetidos
+                starts = np.sort(np.array(firsts))
+                if len(starts) > 1 and (np.diff(starts) < block).any():
+                    raise RuntimeError(f"Blocos sobrepostos no backend {backend} (bloco {block}).")
+                codes = len(firsts) * block
+                p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+                results.append({
+                    "backend": backend, "bloco": block, "workers": workers, "codigos": codes,
+                    "reservas": len(firsts), "segundos": round(seconds, 4),
+                    "codigos_por_segundo": round(codes / seconds) if seconds else None,
+                    "p50_ms": round(p50, 2), "p95_ms": round(p95, 2), **extra,
+                })
+                r = results[-1]
+                print(f"{backend:<8} bloco {block:>6} {r['reservas']:>6} reservas {seconds:>8.3f}s {r['codigos_por_segundo'] or 0:>10} códigos/s "
+                      f"p50 {r['p50_ms']:>8.2f} ms p95 {r['p95_ms']:>8.2f} ms" + (f" {extra['conflitos']} conflitos" if extra else ""), flush=True)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede a reserva de sequenciais por backend e tamanho de bloco.")
+    parser.add_argument("--blocos", type=int, nargs="+", default=DEFAULT_BLOCKS, help="tamanhos de bloco por reserva")
+    parser.add_argument("--codigos", type=int, default=10_000, help="total de códigos reservados por tamanho de bloco")
+    parser.add_argument("--workers", type=int, default=4, help="threads reservando ao mesmo tempo")
+    parser.add_argument("--latencia-ms", type=float, default=20.0, help="latência simulada por ida ao Realtime Database")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--saida", help="acrescenta os resultados em JSON lines neste arquivo")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.blocos, args.codigos, args.workers, args.latencia_ms, args.backends)
+    if args.saida:
+        context = {"data": datetime.now().isoformat(timespec="seconds"), "revisao": _git_revision(),
+                   "python": platform.python_version(), "latencia_ms": args.latencia_ms}
+        with open(args.saida, "a", encoding="utf-8") as f:
+            for r in results:
+                f.write(json.dumps({**context, **r}, ensure_ascii=False) + "\n")
+
+if __name__ == "__main__":
+    main()
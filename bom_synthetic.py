@@ -0,0 +1,110 @@
+"""Gerador de listas de materiais sintéticas no formato exportado pelo SolidWorks.
+
+Usado pelos benchmarks (bom_benchmark.py) e para reproduzir problemas com
+listas grandes sem depender de arquivos de clientes.
+
+Uso:
+    python bom_synthetic.py SAIDA.txt|SAIDA.xlsx --linhas 50000 [--profundidade 5] [--fabricado 0.4] [--existentes 0.2]
+"""
+import argparse
+import io
+
+import numpy as np
+import pandas as pd
+
+from bom_processor import GROUP_TABLE
+
+MATERIAIS = ["AÇO SAE 1020", "AÇO INOX 304", "ALUMÍNIO 6061", "NYLON", "LATÃO", ""]
+COMERCIAIS = ["PARAFUSO SEXTAVADO", "PORCA", "ARRUELA LISA", "ROLAMENTO", "MOTOR", "CILINDRO", "VÁLVULA", "CONECTOR"]
+FABRICADOS = ["CHAPA", "EIXO", "SUPORTE", "TAMPA", "BASE", "FLANGE", "BUCHA", "CONJUNTO SOLDADO"]
+
+def item_numbers(rows, max_depth, rng):
+    """Numeração hierárquica em profundidade (1, 1.1, 1.1.1, 1.2, 2...), com até `max_depth` níveis."""
+    # A cada linha o nível sobe, desce um ou volta a um nível anterior
+    moves = rng.integers(-2, 2, size=rows)
+    stack, out = [], []
+    for move in moves.tolist():
+        depth = min(max(len(stack) + move, 1), max_depth) if stack else 1
+        stack = stack[:depth]
+        if len(stack) < depth: stack.append(0)
+        stack[-1] += 1
+        out.append(".".join(map(str, stack)))
+    return out
+
+def generate_bom(rows, max_depth=4, fabricado_share=0.4, existing_code_share=0.2, blank_process_share=0.1,
+                 special_share=0.02, seed=0):
+    """Gera uma lista com `rows` itens, já na ordem de exibição (de cima para baixo).
+
+    - `fabricado_share`: fração de itens fabricados (Nº DA PEÇA no padrão DD-DDDD-DDDD-...).
+    - `existing_code_share`: fração dos comerciais que já têm código GGG-NNNNNN.
+    - `blank_process_share`: fração com PROCESSO em branco (preenchido pelo processamento).
+    - `special_share`: fração de estruturas especiais (DD-DDDD-XXXX-DD).
+    """
+    rng = np.random.default_rng(seed)
+    groups = np.array(list(GROUP_TABLE))
+    group_idx = rng.integers(0, len(groups), size=rows)
+    group_labels = np.array([f"{g} - {d}" for g, d in GROUP_TABLE.items()], dtype=object)[group_idx]
+
+    kind = rng.random(rows)
+    special = kind < special_share
+    fabricado = ~special & (kind < special_share + fabricado_share)
+    comercial = ~special & ~fabricado
+    existing = comercial & (rng.random(rows) < existing_code_share)
+
+    n1, n2, n3, n4 = (rng.integers(lo, hi, size=rows) for lo, hi in ((10, 99), (1000, 9999), (0, 9999), (0, 99)))
+    num_peca = np.array([f"{a}-{b}-{c:04d}-{d:02d}" for a, b, c, d in zip(n1, n2, n3, n4)], dtype=object)
+    special_idx = np.flatnonzero(special)
+    num_peca[special_idx] = [f"{a}-{b}-AB{c % 100:02d}-{d:02d}" for a, b, c, d in zip(n1[special_idx], n2[special_idx], n3[special_idx], n4[special_idx])]
+    com_idx = np.flatnonzero(comercial & ~existing)
+    num_peca[com_idx] = [f"{COMERCIAIS[c % len(COMERCIAIS)][:4]}-{b}" for c, b in zip(n3[com_idx], n2[com_idx])]
+    seqs = rng.integers(1, 50_000, size=rows)
+    ex_idx = np.flatnonzero(existing)
+    num_peca[ex_idx] = [f"{g}-{s:06d}" for g, s in zip(groups[group_idx[ex_idx]], seqs[ex_idx])]
+
+    names = np.where(fabricado | special, np.array(FABRICADOS, dtype=object)[n3 % len(FABRICADOS)],
+                     np.array(COMERCIAIS, dtype=object)[n3 % len(COMERCIAIS)])
+    processo = np.where(fabricado | special, "FABRICADO", "COMERCIAL").astype(object)
+    processo[rng.random(rows) < blank_process_share] = ""
+
+    return pd.DataFrame({
+        "Nº DO ITEM": item_numbers(rows, max_depth, rng),
+        "Nº DA PEÇA": num_peca,
+        "TÍTULO": [f"{n} {i}" for n, i in zip(names, n4)],
+        "QTD.": rng.integers(1, 20, size=rows),
+        "PROCESSO": processo,
+        "GRUPO DE PRODUTO": np.where(fabricado, "", group_labels),
+        "MATERIAL": np.array(MATERIAIS, dtype=object)[n2 % len(MATERIAIS)],
+        "MASSA": np.round(rng.random(rows) * 10, 3),
+    })
+
+def to_solidworks_txt(df, encoding="utf-8"):
+    """Exporta como o TXT do SolidWorks: itens de baixo para cima, separados por tabulação, cabeçalho no fim."""
+    out = io.StringIO()
+    df.iloc[::-1].to_csv(out, sep="\t", header=False, index=False, lineterminator="\r\n")
+    out.write("\t".join(df.columns) + "\r\n")
+    return out.getvalue().encode(encoding)
+
+def to_xlsx(df):
+    out = io.BytesIO()
+    with pd.ExcelWriter(out, engine="xlsxwriter") as w:
+        df.to_excel(w, index=False, sheet_name="Lista de Peças")
+    return out.getvalue()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera uma BOM sintética no formato do SolidWorks.")
+    parser.add_argument("saida", help="arquivo .txt ou .xlsx")
+    parser.add_argument("--linhas", type=int, default=10_000)
+    parser.add_argument("--profundidade", type=int, default=4)
+    parser.add_argument("--fabricado", type=float, default=0.4, help="fração de itens fabricados")
+    parser.add_argument("--existentes", type=float, default=0.2, help="fração de comerciais já codificados")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    df = generate_bom(args.linhas, args.profundidade, args.fabricado, args.existentes, seed=args.seed)
+    data = to_xlsx(df) if args.saida.lower().endswith(".xlsx") else to_solidworks_txt(df)
+    with open(args.saida, "wb") as f:
+        f.write(data)
+    print(f"{args.linhas} linhas gravadas em {args.saida}")
+
+if __name__ == "__main__":
+    main()
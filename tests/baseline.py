@@ -0,0 +1,152 @@
+"""Implementação original do app (antes da vetorização), usada como referência nos testes.
+
+Cópia de load_data e process_codes do app.py inicial, sem o Streamlit: a
+leitura recebe os bytes e o nome do arquivo, e os sequenciais que seriam
+gravados no estado_sequenciais.json são devolvidos junto com o resultado.
+"""
+import io
+import re
+
+import pandas as pd
+
+MAX_SEQ = 999_999
+
+COLUNAS_OBRIGATORIAS = [
+    'Nº DO ITEM', 'Nº DA PEÇA', 'TÍTULO', 'QTD.',
+    'PROCESSO', 'GRUPO DE PRODUTO'
+]
+
+def load_data(content_bytes, file_name):
+    report_log, df = [], None
+    try:
+        name = file_name.lower()
+        if name.endswith(".txt"):
+            try:
+                content_str = content_bytes.decode('utf-8')
+            except UnicodeDecodeError:
+                report_log.append("ℹ️ Arquivo não é UTF-8, tentando decodificar como Latin-1.")
+                content_str = content_bytes.decode('latin-1')
+
+            lines = [line for line in content_str.splitlines() if line.strip()]
+            if not lines:
+                return None, [], "Arquivo TXT está vazio ou contém apenas linhas em branco."
+
+            header_line = lines[-1]
+            data_lines = lines[:-1]
+            header = [h.strip() for h in header_line.split('\t')]
+            data_io = io.StringIO("\n".join(data_lines))
+
+            df = pd.read_csv(data_io, sep='\t', header=None, names=header, engine='python', dtype=str)
+            df = df.iloc[::-1].reset_index(drop=True)
+        else:
+            return None, [], "Formato de arquivo não suportado."
+
+        missing_cols = set(COLUNAS_OBRIGATORIAS) - set(df.columns)
+        if missing_cols:
+            report_log.append(f"⚠️ Colunas obrigatórias ausentes (criadas vazias): **{', '.join(sorted(list(missing_cols)))}**")
+            for col in sorted(list(missing_cols)):
+                df[col] = ''
+
+        final_order = COLUNAS_OBRIGATORIAS + sorted(list(set(df.columns) - set(COLUNAS_OBRIGATORIAS)))
+        df = df[final_order].copy()
+        df['QTD.'] = pd.to_numeric(df['QTD.'], errors='coerce').fillna(0)
+        df.fillna('', inplace=True)
+        return df, report_log, "Arquivo lido com sucesso."
+
+    except Exception as e:
+        return None, [f"❌ Erro ao ler o arquivo: {e}"], f"Erro ao ler o arquivo: {e}"
+
+def process_codes(df, sequentials, json_state, column_report, main_assembly_code):
+    """Retorna (df, relatório, sequenciais gravados)."""
+    if df is None or df.empty: return pd.DataFrame(), [], "DataFrame vazio."
+    report_log = list(column_report)
+
+    for g in sequentials.keys():
+        sequentials[g] = max(int(sequentials[g]), int(json_state.get(g, 0)))
+
+    group_pattern = re.compile(r'(\d{3})')
+    manu_pattern = re.compile(r'^\d{2}-\d{4}-\d{4}-.*')
+    comm_pattern = re.compile(r'^\d{3}-(\d+)$')
+    special_structure_pattern = re.compile(r'^\d{2}-\d{4}-[A-Za-z0-9]{4}-\d{2}$')
+
+    df['PROCESSO'] = df['PROCESSO'].astype(str).str.strip().str.upper()
+    empty_process = df['PROCESSO'].isin(['', 'NAN', None]) | pd.isna(df['PROCESSO'])
+    count_filled = 0
+    for i in df[empty_process].index:
+        is_manu = manu_pattern.match(str(df.loc[i, 'Nº DA PEÇA']))
+        df.loc[i, 'PROCESSO'] = 'FABRICADO' if is_manu else 'COMERCIAL'
+        count_filled += 1
+    if count_filled > 0:
+        report_log.append(f"✔️ Coluna 'PROCESSO' preenchida para {count_filled} itens.")
+
+    df['CÓDIGO FINAL'] = 'NULO'
+
+    for _, row in df.iterrows():
+        num = str(row.get('Nº DA PEÇA',''))
+        if m := comm_pattern.match(num):
+            try:
+                group, seq_str = num.split('-')
+                sequentials[group] = max(sequentials.get(group, 0), int(seq_str))
+            except:
+                continue
+
+    generated_codes_count = 0
+    for i, row in df.iterrows():
+        num_peca = str(row.get('Nº DA PEÇA',''))
+
+        if special_structure_pattern.match(num_peca):
+            df.loc[i, 'CÓDIGO FINAL'] = num_peca
+            continue
+
+        if row['PROCESSO'] == 'FABRICADO':
+            df.loc[i, 'CÓDIGO FINAL'] = row.get('Nº DA PEÇA', '')
+            continue
+
+        if (m_direct := comm_pattern.match(num_peca)) and len(m_direct.group(1)) == 6:
+            df.loc[i, 'CÓDIGO FINAL'] = num_peca
+            continue
+
+        if m := group_pattern.search(str(row.get('GRUPO DE PRODUTO',''))):
+            g = m.group(1)
+            next_code = sequentials.get(g, 0) + 1
+
+            while f"{g}-{next_code:06d}" in df['CÓDIGO FINAL'].values:
+                next_code += 1
+
+            if next_code > MAX_SEQ:
+                raise Exception(f"Limite de 6 dígitos atingido para o grupo {g}.")
+
+            sequentials[g] = next_code
+            new_code = f"{g}-{sequentials[g]:06d}"
+            df.loc[i, 'CÓDIGO FINAL'] = new_code
+            generated_codes_count += 1
+        else:
+            report_log.append(f"⚠️ \"{row.get('TÍTULO','')}\" COMERCIAL sem grupo -> NULO")
+
+    df['Nº DO ITEM'] = df['Nº DO ITEM'].astype(str).str.strip()
+    code_map = pd.Series(df['CÓDIGO FINAL'].values, index=df['Nº DO ITEM']).to_dict()
+
+    def find_parent_code(item_id):
+        parts = item_id.split('.')
+        while len(parts) > 1:
+            parts.pop()
+            if (parent := '.'.join(parts)) in code_map:
+                return code_map[parent]
+        return ""
+
+    df['CÓDIGO PAI'] = df['Nº DO ITEM'].apply(find_parent_code)
+
+    if main_assembly_code:
+        main_code_upper = str(main_assembly_code).strip().upper()
+        df.loc[df['CÓDIGO PAI'] == '', 'CÓDIGO PAI'] = main_code_upper
+
+    df['TIPO'] = df.apply(lambda r: 1 if r['PROCESSO'] == 'FABRICADO' else 2 if r['CÓDIGO FINAL'] != 'NULO' else 3, axis=1)
+    df = df.sort_values(by=['TIPO','CÓDIGO FINAL']).drop(columns=['TIPO']).reset_index(drop=True)
+
+    for col in df.select_dtypes(include=['object']):
+        df[col] = df[col].astype(str).str.upper()
+
+    saved = {k: int(v) for k, v in sequentials.items()}
+
+    report_log.insert(0, f"✅ Processamento concluído. {generated_codes_count} novos códigos comerciais foram gerados.")
+    return df, report_log, saved
@@ -0,0 +1,38 @@
+"""Listas aleatórias com os casos difíceis da codificação (códigos de 6 dígitos ou não, PROCESSO vazio, grupos inválidos)."""
+import random
+
+import numpy as np
+import pandas as pd
+
+GROUPS = ['100', '200', '300', '400', '500', '600', '700', '800', '900', '950']
+
+def random_bom(rows, seed):
+    r = random.Random(seed)
+
+    def peca():
+        c = r.random()
+        if c < .15: return f"{r.randint(10, 99)}-{r.randint(1000, 9999)}-{r.choice(['AB12', '0000', 'x9Z1'])}-{r.randint(10, 99)}"
+        if c < .35: return f"{r.randint(10, 99)}-{r.randint(1000, 9999)}-{r.randint(1000, 9999)}-{r.choice(['A', '', '01'])}"
+        if c < .5: return f"{r.choice(['100', '200', '300', '950'])}-{r.randint(0, 99999):06d}"
+        if c < .58: return f"{r.choice(['100', '200', '123'])}-{r.randint(0, 99999)}"
+        if c < .62: return ''
+        if c < .64: return f"{r.choice(['100', '200'])}-{r.randint(0, 99):06d}\n"
+        return r.choice(['PARAFUSO M8', 'arruela', 'abc-12', 'XYZ']) + str(r.randint(0, 99))
+
+    processes = ['', 'nan', 'FABRICADO', 'comercial', ' Fabricado ', 'COMERCIAL', None, np.nan, 'outro']
+    groups = ['100 - Mecânico', '200', '', 'x', 'Grupo 9505', '300abc', None, '950 Serviço', '12']
+    items, stack = [], []
+    for _ in range(rows):
+        depth = r.randint(1, 4)
+        stack = (stack + [0] * depth)[:depth]
+        stack[-1] += 1
+        items.append('.'.join(map(str, stack)) + (' ' if r.random() < .05 else ''))
+    return pd.DataFrame({
+        'Nº DO ITEM': items,
+        'Nº DA PEÇA': [peca() for _ in range(rows)],
+        'TÍTULO': [r.choice(['Tampa', 'eixo', 'Motor ç', '']) for _ in range(rows)],
+        'QTD.': [float(r.randint(0, 5)) for _ in range(rows)],
+        'PROCESSO': [r.choice(processes) for _ in range(rows)],
+        'GRUPO DE PRODUTO': [r.choice(groups) for _ in range(rows)],
+        'Extra': [r.choice(['a', 'B', None]) for _ in range(rows)],
+    })
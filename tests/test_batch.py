@@ -0,0 +1,20 @@
+"""Processamento em lote de uma pasta (bom_batch.run_batch)."""
+import os
+
+from bom_batch import run_batch
+from bom_synthetic import generate_bom, to_solidworks_txt, to_xlsx
+
+def test_same_stem_inputs_are_refused(tmp_path, monkeypatch):
+    # X.txt e X.xlsx gravariam os dois em X.csv e seriam revisões do mesmo conjunto
+    monkeypatch.chdir(tmp_path)  # cache de leitura e log de tempos ficam fora do repositório
+    entrada, saida = tmp_path / "entrada", tmp_path / "saida"
+    entrada.mkdir()
+    (entrada / "X.txt").write_bytes(to_solidworks_txt(generate_bom(30, seed=1)))
+    (entrada / "x.xlsx").write_bytes(to_xlsx(generate_bom(30, seed=2)))
+    (entrada / "Y.txt").write_bytes(to_solidworks_txt(generate_bom(30, seed=3)))
+    summary = run_batch(str(entrada), str(saida), fmt="csv", workers=2, db_path=str(tmp_path / "seq.db"))
+
+    status = {r["arquivo"]: r["status"] for r in summary["resultados"]}
+    assert status == {"X.txt": "erro", "x.xlsx": "erro", "Y.txt": "ok"}
+    assert summary["arquivos"] == 3 and summary["erros"] == 2
+    assert sorted(os.listdir(saida)) == ["Y.csv", "resumo_lote.json"]
@@ -0,0 +1,70 @@
+"""RealtimeDatabaseStore contra o substituto em memória do Realtime Database (sem rede)."""
+import threading
+
+import pandas as pd
+import pytest
+
+from bom_cases import GROUPS, random_bom
+from bom_firebase import RTDB_PATH, InMemoryDatabase, RealtimeDatabaseStore
+from bom_processor import MAX_SEQ, SequenceStore, process_codes
+
+def _store(database=None, seed=None):
+    database = database or InMemoryDatabase()
+    return RealtimeDatabaseStore(database.reference(RTDB_PATH), seed)
+
+@pytest.mark.parametrize("seed", range(1, 40))
+def test_process_codes_matches_sqlite(seed, tmp_path):
+    df = random_bom([1, 5, 50, 300][seed % 4], seed)
+    sequentials = {g: (seed * 7) % 50 for g in GROUPS}
+    with SequenceStore(str(tmp_path / "seq.db"), legacy_json=None) as sqlite_store:
+        expected = process_codes(df.copy(), dict(sequentials), {}, [], 'X', store=sqlite_store)
+        expected_state = sqlite_store.load()
+    rtdb_store = _store()
+    current = process_codes(df.copy(), dict(sequentials), {}, [], 'X', store=rtdb_store)
+    pd.testing.assert_frame_equal(current[0], expected[0])
+    assert current[1] == expected[1]
+    assert rtdb_store.load() == expected_state
+
+def test_concurrent_reservations_are_disjoint():
+    database = InMemoryDatabase(latency=0.001)
+    reserved, lock = [], threading.Lock()
+
+    def worker():
+        store = _store(database)
+        for _ in range(30):
+            firsts = store.reserve_many({'100': (7, 0), '200': (3, 0)})
+            with lock:
+                reserved.extend(('100', s) for s in range(firsts['100'], firsts['100'] + 7))
+                reserved.extend(('200', s) for s in range(firsts['200'], firsts['200'] + 3))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert len(set(reserved)) == len(reserved) == 8 * 30 * 10
+    assert _store(database).load() == {'100': 8 * 30 * 7, '200': 8 * 30 * 3}
+
+def test_reserve_floor_raise_to_and_limit():
+    store = _store()
+    assert store.reserve('300', 5, floor=100) == 101
+    store.raise_to({'300': 50, '400': 9})
+    assert store.load() == {'300': 105, '400': 9}
+    with pytest.raises(Exception, match="Limite de 6 dígitos atingido para o grupo 400."):
+        store.reserve_many({'300': (1, 0), '400': (MAX_SEQ, 0)})
+    assert store.load() == {'300': 105, '400': 9}
+
+def test_empty_node_is_seeded_from_local_state(tmp_path):
+    with SequenceStore(str(tmp_path / "seq.db"), legacy_json=None) as local:
+        local.raise_to({'100': 42, '200': 7})
+        seed = local.load()
+    database = InMemoryDatabase()
+    store = _store(database, seed)
+    assert store.load() == {'100': 42, '200': 7}
+    assert store.reserve('100', 1) == 43
+    # Com o nó já preenchido, outra réplica não importa o estado local de novo
+    _store(database, {'100': 1, '300': 5})
+    assert store.load() == {'100': 43, '200': 7}
+
+def test_list_shaped_node():
+    # O Realtime Database devolve como lista um nó com chaves numéricas densas
+    database = InMemoryDatabase({RTDB_PATH: [None, 5, 7]})
+    assert _store(database).load() == {'1': 5, '2': 7}
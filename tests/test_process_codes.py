@@ -0,0 +1,85 @@
+"""process_codes vetorizado contra a implementação original (tests/baseline.py) em listas aleatórias."""
+import pandas as pd
+import pytest
+
+import baseline
+from bom_cases import GROUPS, random_bom
+from bom_processor import MAX_SEQ, SequenceStore, process_codes
+
+# Listas vazias ficam no teste próprio: os dois lados devolvem só o aviso
+SEEDS = [s for s in range(60) if s % 5]
+
+def _run_baseline(df, sequentials, json_state, main_code):
+    try:
+        df_out, report, saved = baseline.process_codes(df, sequentials, json_state, ['ℹ️ coluna'], main_code)
+    except Exception as e:
+        return ('erro', str(e))
+    return df_out, report, saved
+
+def _run_current(df, sequentials, json_state, main_code, db_path):
+    with SequenceStore(str(db_path), legacy_json=None) as store:
+        try:
+            df_out, report = process_codes(df, sequentials, json_state, ['ℹ️ coluna'], main_code, store=store)
+        except Exception as e:
+            return ('erro', str(e))
+        return df_out, report, store.load()
+
+def _case(seed):
+    rows = [0, 1, 5, 50, 300][seed % 5]
+    sequentials = {g: (seed * 7) % 50 for g in GROUPS}
+    if seed % 11 == 3: sequentials['100'] = MAX_SEQ - 1
+    json_state = {'100': 3, '200': 80, 'zzz': 1}
+    main_code = ['', 'conj-01', None][seed % 3]
+    return random_bom(rows, seed), sequentials, json_state, main_code
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_matches_baseline(seed, tmp_path):
+    df, sequentials, json_state, main_code = _case(seed)
+    expected_seqs, current_seqs = dict(sequentials), dict(sequentials)
+    expected = _run_baseline(df.copy(), expected_seqs, json_state, main_code)
+    current = _run_current(df.copy(), current_seqs, json_state, main_code, tmp_path / "seq.db")
+
+    if isinstance(expected[0], str) or isinstance(current[0], str):
+        assert current == expected
+        return
+    pd.testing.assert_frame_equal(current[0], expected[0])
+    assert current[1] == expected[1]
+    assert current_seqs == expected_seqs
+    assert current[2] == expected[2]
+
+def test_empty_frame_matches_baseline(tmp_path):
+    df = random_bom(0, 0)
+    expected = baseline.process_codes(df.copy(), {}, {}, [], 'X')
+    with SequenceStore(str(tmp_path / "seq.db"), legacy_json=None) as store:
+        current = process_codes(df.copy(), {}, {}, [], 'X', store=store)
+    pd.testing.assert_frame_equal(current[0], expected[0])
+    assert current[1:] == expected[1:]
+
+@pytest.mark.parametrize("groups, counters, group", [
+    (['100', '100', '200'], {'100': MAX_SEQ - 1}, '100'),
+    # Dois grupos estouram: vale o da primeira linha que passa do limite, não o primeiro grupo da lista
+    (['100', '200', '100'], {'100': MAX_SEQ - 1, '200': MAX_SEQ}, '200'),
+])
+def test_overflow_error_matches_baseline(groups, counters, group, tmp_path):
+    df = pd.DataFrame({
+        'Nº DO ITEM': ['1', '2', '3'], 'Nº DA PEÇA': ['A', 'B', 'C'], 'TÍTULO': ['x', 'y', 'z'],
+        'QTD.': [1.0, 1.0, 1.0], 'PROCESSO': ['COMERCIAL'] * 3, 'GRUPO DE PRODUTO': groups,
+    })
+    sequentials = {g: 0 for g in GROUPS}
+    sequentials.update(counters)
+    expected = _run_baseline(df.copy(), dict(sequentials), {}, 'X')
+    current = _run_current(df.copy(), dict(sequentials), {}, 'X', tmp_path / "seq.db")
+    assert expected == ('erro', f"Limite de 6 dígitos atingido para o grupo {group}.")
+    assert current == expected
+
+def test_overflow_keeps_stored_counters(tmp_path):
+    # Uma lista que estoura o limite não pode deixar sequenciais reservados pela metade
+    df = pd.DataFrame({
+        'Nº DO ITEM': ['1', '2'], 'Nº DA PEÇA': ['A', 'B'], 'TÍTULO': ['x', 'y'], 'QTD.': [1.0, 1.0],
+        'PROCESSO': ['COMERCIAL'] * 2, 'GRUPO DE PRODUTO': ['100', '200'],
+    })
+    with SequenceStore(str(tmp_path / "seq.db"), legacy_json=None) as store:
+        store.raise_to({'100': MAX_SEQ, '200': 5})
+        with pytest.raises(Exception, match="Limite de 6 dígitos"):
+            process_codes(df, {g: 0 for g in GROUPS}, store.load(), [], 'X', store=store)
+        assert store.load() == {'100': MAX_SEQ, '200': 5}
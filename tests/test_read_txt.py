@@ -0,0 +1,70 @@
+"""Leitura do TXT do SolidWorks (parse_upload) contra a implementação original (tests/baseline.py)."""
+import random
+
+import pandas as pd
+import pytest
+
+import baseline
+from bom_cases import random_bom
+from bom_processor import parse_upload
+
+def make_txt(seed):
+    # Colunas em ordem aleatória, linhas em branco no meio, cabeçalho com espaços, CRLF e Latin-1
+    r = random.Random(seed)
+    df = random_bom([0, 1, 7, 200][seed % 4], seed).fillna('')
+    cols = list(df.columns)
+    r.shuffle(cols)
+    if seed % 5 == 1: cols = [c for c in cols if c != 'PROCESSO']
+    out = []
+    for row in df[cols].itertuples(index=False):
+        out.append('\t'.join(str(v).replace('\n', '') for v in row))
+        if r.random() < .05: out.append(r.choice(['', '   ', '\t']))
+    out.append('\t'.join(f' {c} ' for c in cols) if seed % 3 else '\t'.join(cols))
+    if seed % 4 == 2: out += ['', '  ']
+    nl = '\r\n' if seed % 2 else '\n'
+    text = nl.join(out) + (nl if seed % 3 == 0 else '')
+    if seed % 6 == 5: text = text.replace('Motor ç', 'Motor ção é tubo 1/2"')
+    return text.encode('latin-1' if seed % 7 == 3 else 'utf-8')
+
+HEADER = '\t'.join(baseline.COLUNAS_OBRIGATORIAS)
+
+EDGE_CASES = [
+    b'', b'\n\n  \n', b'A\tB\n', b'\n\nNo DO ITEM\tQTD.\n\n',
+    b'x\ty\n1\t2\n' + 'é'.encode('latin-1') + b'\t3\n' + 'Nº DO ITEM\tQTD.'.encode(),
+    b'1\t' + 'ç'.encode() * 40000 + b'\n2\t\xe9\n' + 'Nº DO ITEM\tTÍTULO'.encode('latin-1'),
+]
+
+# Linhas com tabulação sobrando no fim ou com menos campos que o cabeçalho
+RAGGED_CASES = {
+    "tabulação no fim de todas": '1\tA\tt\t1\t\t100\t\n1.1\tB\tx\t1\t\t200\t\n',
+    "tabulação só na linha de cima": '1\tA\tt\t1\t\t100\t\n1.1\tB\tx\t1\t\t200\n',
+    "tabulação só na linha de baixo": '1\tA\tt\t1\t\t100\n1.1\tB\tx\t1\t\t200\t\n',
+    "várias tabulações": '1\tA\tt\t1\t\t100\t\t\t\n1.1\tB\tx\t1\t\t200\n2\tC\ty\t2\t\t300\t\n',
+    "linha curta": '1\tA\tt\n1.1\tB\tx\t1\t\t200\t\n',
+}
+
+def _assert_same(current, expected):
+    if expected[0] is None or current[0] is None:
+        assert current[0] is None and expected[0] is None
+        assert current[1:] == expected[1:]
+        return
+    pd.testing.assert_frame_equal(current[0], expected[0])
+    assert current[1:] == expected[1:]
+
+@pytest.mark.parametrize("seed", range(80))
+def test_matches_baseline(seed):
+    content = make_txt(seed)
+    _assert_same(parse_upload(content, 'lista.TXT'), baseline.load_data(content, 'lista.TXT'))
+
+@pytest.mark.parametrize("content", EDGE_CASES)
+def test_edge_cases_match_baseline(content):
+    _assert_same(parse_upload(content, 'lista.txt'), baseline.load_data(content, 'lista.txt'))
+
+@pytest.mark.parametrize("data", RAGGED_CASES.values(), ids=RAGGED_CASES.keys())
+def test_trailing_tabs_and_ragged_rows(data):
+    # Tabulações sobrando são campos vazios além do cabeçalho: o resultado é o da lista sem elas
+    content = (data + HEADER).encode()
+    clean = ('\n'.join(line.rstrip('\t') for line in data.splitlines()) + '\n' + HEADER).encode()
+    current = parse_upload(content, 'lista.txt')
+    _assert_same(current, baseline.load_data(clean, 'lista.txt'))
+    assert current[0]['Nº DO ITEM'].iloc[-1] == '1'
@@ -0,0 +1,59 @@
+"""Reaproveitamento de códigos entre revisões do mesmo conjunto (AssemblyRevisions)."""
+import pandas as pd
+import pytest
+
+from bom_processor import AssemblyRevisions, SequenceStore, item_frame, process_codes
+
+@pytest.fixture
+def run(tmp_path):
+    db_path = str(tmp_path / "seq.db")
+
+    def run(rows, seq_db_path=db_path):
+        df = pd.DataFrame(rows, columns=['Nº DO ITEM', 'Nº DA PEÇA', 'TÍTULO', 'QTD.', 'PROCESSO', 'GRUPO DE PRODUTO'])
+        with SequenceStore(seq_db_path, legacy_json=None) as store, AssemblyRevisions(db_path) as revisions:
+            out, report = process_codes(df, {}, store.load(), [], '10-0000-0000-00', store=store, revisions=revisions)
+        return dict(zip(out['Nº DO ITEM'], out['CÓDIGO FINAL'])), report
+    run.db_path = db_path
+    return run
+
+def test_same_list_keeps_codes(run):
+    rows = [['1', 'P1', 'motor', 1, 'COMERCIAL', '200'], ['2', 'P2', 'porca', 4, 'COMERCIAL', '100']]
+    first, _ = run(rows)
+    second, report = run(rows)
+    assert second == first == {'1': '200-000001', '2': '100-000001'}
+    assert report[0] == "✅ Processamento concluído. 0 novos códigos comerciais foram gerados."
+    assert report[1] == "✔️ 2 códigos comerciais reaproveitados da revisão anterior."
+
+def test_fabricado_part_number_is_not_reused(run):
+    # Como FABRICADO, o código é o próprio Nº DA PEÇA; ao virar COMERCIAL, o item precisa de um código novo
+    run([['1', '100-XYZ', 'suporte', 1, 'FABRICADO', '100']])
+    codes, report = run([['1', '100-XYZ', 'suporte', 1, 'COMERCIAL', '100']])
+    assert codes == {'1': '100-000001'}
+    assert report[0] == "✅ Processamento concluído. 1 novos códigos comerciais foram gerados."
+    assert not any("reaproveitados" in line for line in report)
+
+def test_reused_code_already_in_list_is_not_repeated(run):
+    # O código guardado do item 1 foi digitado no Nº DA PEÇA de outra linha: o item 1 recebe um novo
+    motor = ['1', 'P1', 'motor', 1, 'COMERCIAL', '200']
+    run([motor])
+    codes, report = run([motor, ['2', '200-000001', 'motor', 1, 'COMERCIAL', '200']])
+    assert codes == {'1': '200-000002', '2': '200-000001'}
+    assert report[0] == "✅ Processamento concluído. 1 novos códigos comerciais foram gerados."
+    assert not any("reaproveitados" in line for line in report)
+
+def test_new_codes_start_above_reused_ones(run, tmp_path):
+    # Com um estado de sequenciais mais baixo que o das revisões (ex.: outro banco), o código
+    # novo não pode coincidir com o reaproveitado
+    run([['1', 'P1', 'motor', 1, 'COMERCIAL', '200']])
+    codes, _ = run([['1', 'P1', 'motor', 1, 'COMERCIAL', '200'], ['2', 'P2', 'bomba', 1, 'COMERCIAL', '200']],
+                   seq_db_path=str(tmp_path / "outro.db"))
+    assert codes == {'1': '200-000001', '2': '200-000002'}
+
+def test_same_stored_code_is_reused_once(run):
+    # Dois itens gravados com o mesmo código (revisão inconsistente): só o primeiro o mantém
+    items = item_frame(['P1', 'P2'], ['motor', 'bomba'], ['200', '200'], [1, 1]).assign(codigo='200-000007', ativo=True)
+    with AssemblyRevisions(run.db_path) as revisions:
+        revisions.save('10-0000-0000-00', 1, items)
+    codes, report = run([['1', 'P1', 'motor', 1, 'COMERCIAL', '200'], ['2', 'P2', 'bomba', 1, 'COMERCIAL', '200']])
+    assert codes == {'1': '200-000007', '2': '200-000008'}
+    assert report[1] == "✔️ 1 códigos comerciais reaproveitados da revisão anterior."
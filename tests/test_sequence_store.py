@@ -0,0 +1,58 @@
+"""SequenceStore com vários processos gravando no mesmo banco."""
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from bom_processor import SequenceStore, process_codes
+
+WORKERS = 6
+RUNS_PER_WORKER = 5
+ROWS = 120
+GROUPS = ['100', '200', '300']
+
+def _process_lists(db_path):
+    # Cada execução é uma "sessão" nova: lê o estado, processa e grava, como o app e o lote
+    codes = []
+    for _ in range(RUNS_PER_WORKER):
+        df = pd.DataFrame({
+            'Nº DO ITEM': [str(i + 1) for i in range(ROWS)], 'Nº DA PEÇA': ['PARAFUSO'] * ROWS, 'TÍTULO': ['t'] * ROWS,
+            'QTD.': [1.0] * ROWS, 'PROCESSO': ['COMERCIAL'] * ROWS, 'GRUPO DE PRODUTO': [GROUPS[i % 3] for i in range(ROWS)],
+        })
+        with SequenceStore(db_path, legacy_json=None) as store:
+            out, _ = process_codes(df, {g: 0 for g in GROUPS}, store.load(), [], 'X', store=store)
+        codes += out['CÓDIGO FINAL'].tolist()
+    return codes
+
+def _reserve_blocks(db_path):
+    reserved = []
+    with SequenceStore(db_path, legacy_json=None) as store:
+        for i in range(40):
+            # Grupos alternados, com dois grupos em comum entre os workers
+            for g in GROUPS[i % 2:i % 2 + 2]:
+                first = store.reserve(g, 7)
+                reserved += [(g, first + k) for k in range(7)]
+    return reserved
+
+def test_concurrent_processes_never_repeat_codes(tmp_path):
+    db_path = str(tmp_path / "seq.db")
+    SequenceStore(db_path, legacy_json=None).close()
+    with ProcessPoolExecutor(max_workers=WORKERS) as pool:
+        results = list(pool.map(_process_lists, [db_path] * WORKERS))
+    codes = [c for r in results for c in r]
+    assert len(codes) == WORKERS * RUNS_PER_WORKER * ROWS
+    assert len(set(codes)) == len(codes)
+    with SequenceStore(db_path, legacy_json=None) as store:
+        assert store.load() == {g: WORKERS * RUNS_PER_WORKER * ROWS // 3 for g in GROUPS}
+
+def test_concurrent_reservations_are_disjoint(tmp_path):
+    db_path = str(tmp_path / "seq.db")
+    SequenceStore(db_path, legacy_json=None).close()
+    with ProcessPoolExecutor(max_workers=WORKERS) as pool:
+        results = list(pool.map(_reserve_blocks, [db_path] * WORKERS))
+    reserved = [s for r in results for s in r]
+    assert len(set(reserved)) == len(reserved)
+    with SequenceStore(db_path, legacy_json=None) as store:
+        last = store.load()
+    # Sem buracos: cada grupo termina exatamente no total reservado
+    for g in GROUPS:
+        assert last[g] == sum(1 for group, _ in reserved if group == g)
@@ -0,0 +1,32 @@
+"""StageTimer e a medição de memória por etapa."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from bom_processor import StageTimer
+
+@pytest.mark.skipif(not os.access("/proc/self/clear_refs", os.W_OK), reason="pico de memória do /proc indisponível")
+def test_import_keeps_process_rss_peak():
+    # Importar o módulo não pode zerar o pico de memória residente (VmHWM) de quem o importa
+    script = (
+        "def hwm():\n"
+        "    return int(next(l for l in open('/proc/self/status') if l.startswith('VmHWM')).split()[1])\n"
+        "block = b'x' * (200 * 1024 * 1024); del block\n"
+        "before = hwm()\n"
+        "import bom_processor\n"
+        "print(before, hwm())\n"
+    )
+    out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout
+    before, after = map(int, out.split())
+    assert after >= before > 200 * 1024
+
+def test_stage_records_time_and_rows():
+    timer = StageTimer(memory="0")
+    with timer.stage("leitura", 10) as stage:
+        stage["linhas"] = 20
+    [entry] = timer.stages
+    assert entry["etapa"] == "leitura" and entry["linhas"] == 20 and entry["segundos"] >= 0
+    assert "pico_mb" not in entry